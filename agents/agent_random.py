@@ -5,10 +5,11 @@ import numpy as np
 class RandomAgent(Agent):
 
     def __init__(self, game: AlternatingGame, agent: AgentID, seed=None, name: str = None) -> None:
-        super().__init__(game=game, agent=agent, name=name)
+        super().__init__(game=game, agent=agent, name=name, seed=seed)
 
     def action(self):
-        return np.random.choice(self.game.available_actions())
+        actions = np.flatnonzero(self.game.action_mask())
+        return actions[self.rng.integers(len(actions))]
     
     def policy(self):
         raise ValueError('RandomAgent: Not implemented')
@@ -61,34 +61,44 @@ class CounterFactualRegret(Agent):
         game: AlternatingGame,
         agent: AgentID,
         verbose: bool = False,
+        seed=None,
         name: str = None
     ) -> None:
-        super().__init__(game, agent, name)
+        super().__init__(game, agent, name, seed)
         self.verbose = verbose
-        self.node_dict: dict[ObsType, Node] = {}
+        # nodes indexed by the infoset key of the agent to move
+        self.node_dict: dict[int, Node] = {}
+        # training iterations and infosets updated by them
+        self.train_counters = {'iterations': 0, 'infosets_touched': 0}
 
     def action(
         self
     ) -> ActionType:
+        key = self.game.infoset_key(self.agent)
+        self.counters = {'cache_lookups': 1, 'cache_hits': int(key in self.node_dict), 'max_infosets': len(self.node_dict)}
         return self.choose_action(self.game, self.agent)
 
+    def stats(self) -> dict:
+        return {**super().stats(), **self.train_counters}
+
     def choose_action(
         self,
         game: AlternatingGame,
         agent: AgentID
     ) -> ActionType:
+        key = game.infoset_key(agent)
         try:
-            if game.observe(agent) in self.node_dict:
-                node = self.node_dict[game.observe(agent)]
-                a = np.argmax(np.random.multinomial(1, node.policy(), size=1))
+            if key in self.node_dict:
+                node = self.node_dict[key]
+                a = np.argmax(self.rng.multinomial(1, node.policy()))
                 return a
             else:
                 #raise ValueError('Train agent before calling action()')
                 if self.verbose:
                     print('Node does not exist. Playing random.')
-                return np.random.choice(game.action_space(agent).n)
+                return self.rng.integers(game.action_space(agent).n)
         except:
-            node = self.node_dict[game.observe(agent)]
+            node = self.node_dict[key]
             if self.verbose:
                 print(node.policy())
             raise ValueError('Node does not exist. Playing random.')
@@ -99,6 +109,7 @@ class CounterFactualRegret(Agent):
     ) -> None:
         for _ in range(niter):
             _ = self.cfr()
+        self.train_counters['iterations'] += niter
 
     def cfr(
         self
@@ -133,10 +144,11 @@ class CounterFactualRegret(Agent):
                 return game.reward(learning_agent)
             
             if agent == learning_agent:
-                obs = game.observe(learning_agent)
-                if obs not in self.node_dict:
-                    self.node_dict[obs] = Node(game, obs)
-                node = self.node_dict[obs]
+                key = game.infoset_key(learning_agent)
+                if key not in self.node_dict:
+                    self.node_dict[key] = Node(game, game.observe(learning_agent))
+                node = self.node_dict[key]
+                self.train_counters['infosets_touched'] += 1
                 node_utility = 0
                 curr_policy = node.curr_policy.copy()
                 utility = np.zeros(node.num_actions)
@@ -1,8 +1,12 @@
 from base.game import AlternatingGame, AgentID, ActionType
 from base.agent import Agent
-from math import log, sqrt
+from math import log, sqrt, ceil
 import numpy as np
 from typing import Callable
+from agents.network import PolicyValueNetwork
+
+# uniform numbers drawn at once for the random moves of the rollouts
+ROLLOUT_BUFFER = 4096
 
 class MCTSNode:
     def __init__(self, parent: 'MCTSNode', game: AlternatingGame, action: ActionType):
@@ -15,8 +19,20 @@ class MCTSNode:
         self.value = 0
         self.cum_rewards = np.zeros(len(game.agents))
         self.agent = self.game.agent_selection
+        # rewards of every agent under perfect play once the subtree is solved, None until then
+        self.solved: np.ndarray = None
+        # actions without a child yet, best first (progressive widening)
+        self.untried: list[ActionType] = []
+        # canonical keys of the children (symmetry pruning)
+        self.seen: set[int] = None
+        # probability of the action leading here and of every action from here (evaluator)
+        self.prior = 0.
+        self.priors: np.ndarray = None
 
 def ucb(node: MCTSNode, agent_idx: int, C=sqrt(2)) -> float:
+    if node.solved is not None:
+        # solved subtrees are not searched again
+        return float('-inf')
     if node.visits == 0 or node.parent.visits == 0:
         return float('inf')
     return node.cum_rewards[agent_idx] / node.visits + C * sqrt(log(node.parent.visits)/node.visits)
@@ -35,6 +51,15 @@ class MonteCarloTreeSearch(Agent):
         rollouts: int = 10,
         selection: Callable[[MCTSNode, AgentID], MCTSNode] = uct,
         action_selection_mode: str ='max_count',
+        symmetry_pruning: bool = False,
+        rollout_depth: int = None,
+        eval_weight: float = 0.,
+        widening: float = None,
+        widening_exponent: float = 0.5,
+        evaluator: PolicyValueNetwork = None,
+        c_puct: float = 1.5,
+        batch_size: int = 8,
+        seed=None,
         verbose: bool = False,
         name: str = None
     ) -> None:
@@ -44,29 +69,107 @@ class MonteCarloTreeSearch(Agent):
             agent: agent id of the agent in the game
             simulations: number of MCTS simulations (default: 100)
             rollouts: number of MC rollouts (default: 10)
-            selection: tree search policy (default: uct)
+            selection: tree search policy, picks a child of a node for the agent to move in it (default: uct)
             action_selection_mode: action selection mode (default: max_count) (max_count: max visits, max_value: max value)
+            symmetry_pruning: keep a single child among the children with symmetric states (default: False)
+            rollout_depth: plies after which a rollout stops and backs up the eval() of the game
+                instead of the outcome, None plays until the end (default: None)
+            eval_weight: weight of the eval() of the expanded node in the value backed up, mixed
+                with the rollout result (default: 0, only the rollout)
+            widening: progressive widening, a node with n visits has at most
+                ceil(widening * (n + 1) ** widening_exponent) children, added best first by the
+                eval_children() of the game. None adds every child at once (default: None)
+            widening_exponent: growth of the number of children with the visits (default: 0.5)
+            evaluator: network giving the priors and values of the leaves, replaces selection,
+                rollouts and widening with PUCT and batched leaf evaluations, for two agent
+                zero sum games (default: None, rollouts)
+            c_puct: exploration constant of PUCT (default: 1.5)
+            batch_size: leaves selected (with virtual loss) before they are evaluated in a
+                single call to the evaluator (default: 8)
+            seed: seed of the generator of the rollouts (default: None)
             verbose: print debug information (default: False)
         """
-        super().__init__(game=game, agent=agent, name=name)
+        super().__init__(game=game, agent=agent, name=name, seed=seed)
+        if rollout_depth is not None and rollout_depth < 0:
+            raise ValueError("Rollout depth must be a non-negative integer.")
+        if not 0 <= eval_weight <= 1:
+            raise ValueError("Eval weight must be between 0 and 1.")
+        if widening is not None and widening <= 0:
+            raise ValueError("Widening must be positive.")
+        if not 0 < widening_exponent <= 1:
+            raise ValueError("Widening exponent must be between 0 and 1.")
+        if evaluator is not None and len(game.agents) != 2:
+            raise ValueError("The evaluator needs a two agent game.")
+        if batch_size < 1:
+            raise ValueError("Batch size must be a positive integer.")
         self.simulations = simulations
         self.rollouts = rollouts
         self.selection = selection
         self.action_selection_mode = action_selection_mode
+        self.symmetry_pruning = symmetry_pruning
+        self.rollout_depth = rollout_depth
+        self.eval_weight = eval_weight
+        self.widening = widening
+        self.widening_exponent = widening_exponent
+        self.evaluator = evaluator
+        self.c_puct = c_puct
+        self.batch_size = batch_size
         self.verbose = verbose
         self.agent = agent
+        self._reset_counters()
         
+    def set_seed(self, seed=None) -> None:
+        super().set_seed(seed)
+        self._uniforms: list[float] = []
+        self._next_uniform = 0
+
+    def _reset_counters(self) -> None:
+        # simulations, tree nodes created, symmetric children pruned, rollouts, their steps and
+        # the ones cut at rollout_depth, and depth of the deepest selected node
+        # nodes solved, and leaves evaluated by the evaluator and the batches they took
+        self.counters = {
+            'simulations': 0, 'nodes': 0, 'pruned': 0, 'rollouts': 0, 'rollout_steps': 0, 'cutoffs': 0, 'max_depth': 0,
+            'solved': 0, 'evaluations': 0, 'batches': 0
+        }
+
     def action(self) -> ActionType:
         a, _ = self.mcts()
         return a
 
     def mcts(self) -> (ActionType, float):
+        root = self._search()
+        action, value = self.action_selection(root)
+        return action, value
+
+    def policy(self) -> np.ndarray:
+        """
+        Searches the current position and returns the share of the visits of the root that
+        went to each action (a one hot of the action played when the root is solved), the
+        target of the policy head of the evaluator in self play.
+        """
+        root = self._search()
+        policy = np.zeros(len(self.game.action_mask()))
+        if root.solved is not None:
+            policy[self.action_selection(root)[0]] = 1.
+            return policy
+        for child in root.children:
+            policy[child.action] = child.visits
+        return policy / policy.sum()
 
+    def _search(self) -> MCTSNode:
+        self._reset_counters()
         root = MCTSNode(parent=None, game=self.game, action=None)
+        if self.evaluator is not None:
+            self._search_batched(root)
+            return root
         self._generate_root_children(root)
 
         for i in range(self.simulations):
 
+            if root.solved is not None:
+                # the outcome of every action is known, more simulations would not change the choice
+                break
+            self.counters['simulations'] += 1
             node = root
             node.game = self.game.clone()
 
@@ -97,58 +200,276 @@ class MonteCarloTreeSearch(Agent):
         if self.verbose:
             print('root childs')
             for child in root.children:
-                print(child.action, child.cum_rewards / child.visits)
+                print(child.action, child.cum_rewards / max(child.visits, 1), child.solved)
 
-        action, value = self.action_selection(root)
-
-        return action, value
+        return root
 
     def _generate_root_children(self, root: MCTSNode) -> None:
-        for action in self.game.available_actions():
-            child_game = self.game.clone()
-            child_game.step(action)
-            child_node = MCTSNode(parent=root, game=child_game, action=action)
-            root.children.append(child_node)
+        self._expand(root)
+        self.solve(root)
+
+    def _expand(self, node: MCTSNode) -> None:
+        actions = np.flatnonzero(node.game.action_mask()).tolist()
+        if self.symmetry_pruning:
+            node.seen = set()
+        if self.widening is None:
+            for action in actions:
+                self._add_child(node, action)
+        else:
+            node.untried = self._prior_order(node, actions)
+            self._widen(node)
+
+    def _prior_order(self, node: MCTSNode, actions: list[ActionType]) -> list[ActionType]:
+        # best actions for the agent to move first by the evaluation of the game, ties in random order
+        actions = self.rng.permutation(actions)
+        values = node.game.eval_children(node.agent, actions.tolist())
+        return actions[np.argsort(-values, kind='stable')].tolist()
+
+    def _widen(self, node: MCTSNode) -> None:
+        # children allowed by the visits of the node, one more whenever every child is solved
+        limit = ceil(self.widening * (node.visits + 1) ** self.widening_exponent)
+        while node.untried and (len(node.children) < limit or all(child.solved is not None for child in node.children)):
+            self._add_child(node, node.untried.pop(0))
+
+    def _add_child(self, node: MCTSNode, action: ActionType) -> MCTSNode:
+        child_game = node.game.clone()
+        child_game.step(action)
+        if self.symmetry_pruning:
+            # symmetric children have the same value, search only the first one
+            key = child_game.canonical_key()[0]
+            if key in node.seen:
+                self.counters['pruned'] += 1
+                return None
+            node.seen.add(key)
+        child = MCTSNode(parent=node, game=child_game, action=action)
+        if child_game.game_over():
+            child.solved = self._rewards(child_game)
+            self.counters['solved'] += 1
+        node.children.append(child)
+        self.counters['nodes'] += 1
+        return child
+
+    def solve(self, node: MCTSNode) -> bool:
+        """
+        Proves the value of node from its children (MCTS-Solver): a child solved as a win for
+        the agent to move solves the node with the value of that child, and when every child
+        is solved the node takes the value of the best one for the agent to move.
+        """
+        if node.solved is not None:
+            return True
+        if not node.children:
+            return False
+        agent_idx = node.game.agent_name_mapping[node.agent]
+        solved = [child.solved for child in node.children if child.solved is not None]
+        wins = [rewards for rewards in solved if rewards[agent_idx] >= 1]
+        if wins:
+            node.solved = wins[0]
+        elif len(solved) == len(node.children) and not node.untried:
+            node.solved = max(solved, key=lambda rewards: rewards[agent_idx])
+        else:
+            return False
+        self.counters['solved'] += 1
+        return True
 
     def backprop(self, node: MCTSNode, rewards: np.ndarray) -> None:
+        # the rewards of every agent are added up in every node, each parent picks its child
+        # by the rewards of the agent to move in it. Nodes are proved bottom up while their
+        # children keep getting solved.
         curr_node = node
-        while curr_node.parent:
+        proving = True
+        while curr_node is not None:
+            proving = proving and self.solve(curr_node)
             curr_node.visits += 1
-            curr_node.cum_rewards += rewards if curr_node.agent == self.agent else -rewards
+            curr_node.cum_rewards += rewards
+            self._update_value(curr_node)
             curr_node = curr_node.parent
 
+    def _update_value(self, node: MCTSNode) -> None:
+        # value of node for the agent that chose it
+        if node.parent is None:
+            return
+        agent_idx = node.game.agent_name_mapping[node.parent.agent]
+        if node.solved is not None:
+            node.value = node.solved[agent_idx]
+        else:
+            node.value = node.cum_rewards[agent_idx] / node.visits
+
+    def _rewards(self, game: AlternatingGame) -> np.ndarray:
+        return np.array([game.reward(agent) for agent in game.agents], dtype=float)
+
     def rollout(self, node: MCTSNode) -> np.ndarray:
+        if node.solved is not None:
+            return node.solved.copy()
         u = np.zeros(len(self.game.agents))
         curr_node = node
         game = curr_node.game.clone()
-        while not game.game_over():
-            random_action = np.random.choice(game.available_actions())
-            game.step(random_action)
+        steps = 0
+        max_steps = self.rollout_depth if self.rollout_depth is not None else float('inf')
+        uniforms, i = self._uniforms, self._next_uniform
+        while not game.game_over() and steps < max_steps:
+            if i == len(uniforms):
+                uniforms, i = self.rng.random(ROLLOUT_BUFFER).tolist(), 0
+            actions = np.flatnonzero(game.action_mask())
+            game.step(actions[int(uniforms[i] * len(actions))])
+            i += 1
             u += [game.rewards[agent] for agent in game.agents]
+            steps += 1
+        self._uniforms, self._next_uniform = uniforms, i
+        if not game.game_over():
+            # cut at rollout_depth, the evaluation stands for the rest of the game
+            u += self._eval(game)
+            self.counters['cutoffs'] += 1
+        if self.eval_weight > 0:
+            u = (1 - self.eval_weight) * u + self.eval_weight * self._eval(node.game)
+        self.counters['rollouts'] += 1
+        self.counters['rollout_steps'] += steps
         return u
 
+    def _eval(self, game: AlternatingGame) -> np.ndarray:
+        return np.array([game.eval(agent) for agent in game.agents])
+
     def select_node(self, node: MCTSNode) -> MCTSNode:
         curr_node = node
+        depth = 0
         while curr_node.children:
-            if curr_node.explored_children < len(curr_node.children):
-                return curr_node.children[curr_node.explored_children]
-            curr_node = self.selection(curr_node, self.agent)
+            if curr_node.untried:
+                self._widen(curr_node)
+                if self.solve(curr_node):
+                    # a new child solved it, its value is backed up from here
+                    break
+            depth += 1
+            # the children are tried once in order, skipping the solved ones
+            children = curr_node.children
+            while curr_node.explored_children < len(children) and children[curr_node.explored_children].solved is not None:
+                curr_node.explored_children += 1
+            if curr_node.explored_children < len(children):
+                curr_node = children[curr_node.explored_children]
+                curr_node.parent.explored_children += 1
+                break
+            # the agent to move picks the child
+            curr_node = self.selection(curr_node, curr_node.agent)
+        self.counters['max_depth'] = max(self.counters['max_depth'], depth)
         return curr_node
 
     def expand_node(self, node: MCTSNode) -> None:
-        if not node.game.game_over():
-            node.parent.explored_children += 1
-            for action in node.game.available_actions():
-                child_game = node.game.clone()
-                child_game.step(action)
-                child_node = MCTSNode(parent=node, game=child_game, action=action)
-                node.children.append(child_node)
+        if not node.children and not node.game.game_over():
+            self._expand(node)
+
+    def _search_batched(self, root: MCTSNode) -> None:
+        # PUCT on the priors and values of the evaluator. Up to batch_size leaves are selected
+        # before any is evaluated, each one adding a virtual loss along its path so the next
+        # selections spread over other branches, then the new leaves are evaluated in a single
+        # call and their values backed up, taking the virtual losses back
+        self._evaluate_leaves([root])
+        while self.counters['simulations'] < self.simulations and root.solved is None:
+            leaves = []
+            while len(leaves) < self.batch_size and self.counters['simulations'] < self.simulations and root.solved is None:
+                leaves.append(self._select_puct(root))
+                self.counters['simulations'] += 1
+            values = self._evaluate_leaves(leaves)
+            for leaf in leaves:
+                rewards = leaf.solved if leaf.solved is not None else values[id(leaf)]
+                self._backprop_batched(leaf, rewards)
+
+    def _evaluate_leaves(self, leaves: list[MCTSNode]) -> dict[int, np.ndarray]:
+        # rewards of the unsolved leaves by the evaluator (keyed by node id), the leaves not
+        # expanded yet get their priors and their actions in prior order
+        pending = list({id(leaf): leaf for leaf in leaves if leaf.solved is None}.values())
+        if not pending:
+            return {}
+        policies, values = self.evaluator.evaluate([node.game for node in pending])
+        self.counters['evaluations'] += len(pending)
+        self.counters['batches'] += 1
+        rewards = {}
+        for node, policy, value in zip(pending, policies, values):
+            if node.priors is None:
+                node.priors = policy
+                actions = np.flatnonzero(node.game.action_mask())
+                node.untried = actions[np.argsort(-policy[actions], kind='stable')].tolist()
+                if self.symmetry_pruning:
+                    node.seen = set()
+            rewards[id(node)] = np.full(len(node.game.agents), -float(value))
+            rewards[id(node)][node.game.agent_name_mapping[node.agent]] = value
+        return rewards
+
+    def _select_puct(self, root: MCTSNode) -> MCTSNode:
+        # visits are counted on the way down, the rewards are added by _backprop_batched
+        node = root
+        node.visits += 1
+        depth = 0
+        while node.priors is not None and node.solved is None:
+            child = self._puct_child(node)
+            if child is None:
+                break
+            child.visits += 1
+            child.cum_rewards += self._virtual_loss(child)
+            node = child
+            depth += 1
+        self.counters['max_depth'] = max(self.counters['max_depth'], depth)
+        return node
+
+    def _puct_child(self, node: MCTSNode) -> MCTSNode:
+        # the unsolved child maximizing Q + c_puct * P * sqrt(N) / (1 + n) for the agent to move.
+        # Children are created lazily: the untried action with the highest prior (Q = 0, n = 0)
+        # gets its child once its score beats every existing child
+        agent_idx = node.game.agent_name_mapping[node.agent]
+        exploration = self.c_puct * sqrt(node.visits)
+        best, best_score = None, float('-inf')
+        for child in node.children:
+            if child.solved is not None:
+                continue
+            q = child.cum_rewards[agent_idx] / child.visits if child.visits else 0.
+            score = q + exploration * child.prior / (1 + child.visits)
+            if score > best_score:
+                best, best_score = child, score
+        while node.untried:
+            action = node.untried[0]
+            if best is not None and exploration * node.priors[action] <= best_score:
+                break
+            node.untried.pop(0)
+            child = self._add_child(node, action)
+            if child is None:
+                continue
+            child.prior = float(node.priors[action])
+            if child.solved is not None:
+                self.solve(node)
+            return child
+        if best is None:
+            # every child is solved
+            self.solve(node)
+        return best
+
+    def _virtual_loss(self, node: MCTSNode) -> np.ndarray:
+        # a loss for the agent that chose node, a win for the other one
+        loss = np.ones(len(node.game.agents))
+        loss[node.game.agent_name_mapping[node.parent.agent]] = -1.
+        return loss
+
+    def _backprop_batched(self, node: MCTSNode, rewards: np.ndarray) -> None:
+        # like backprop, but the visits were already counted by _select_puct
+        proving = True
+        while node is not None:
+            proving = proving and self.solve(node)
+            node.cum_rewards += rewards
+            if node.parent is not None:
+                node.cum_rewards -= self._virtual_loss(node)
+            self._update_value(node)
+            node = node.parent
 
     def action_selection(self, node: MCTSNode) -> (ActionType, float):
-        action: ActionType = None
-        value: float = 0
+        # a proven win is played at once, proven losses only when every action loses
+        agent_idx = node.game.agent_name_mapping[node.agent]
+        children = node.children
+        wins = [child for child in children if child.solved is not None and child.solved[agent_idx] >= 1]
+        if wins:
+            return wins[0].action, float(wins[0].solved[agent_idx])
+        not_lost = [child for child in children if child.solved is None or child.solved[agent_idx] > -1]
+        if not_lost:
+            children = not_lost
+
+        child: MCTSNode = None
         if self.action_selection_mode == 'max_count':
-            action = max(node.children, key=lambda x: x.visits).action
+            child = max(children, key=lambda x: x.visits)
         elif self.action_selection_mode == 'max_value':
-            action = max(node.children, key=lambda x: x.value).action
-        return action, value
+            child = max(children, key=lambda x: x.value)
+        return child.action, float(child.value)
@@ -5,25 +5,38 @@ import sys
 
 class MiniMax(Agent):
 
-    def __init__(self, game: AlternatingGame, agent: AgentID, seed=None, depth: int=sys.maxsize, name: str = None) -> None:
-        super().__init__(game, agent, name)
+    def __init__(self, game: AlternatingGame, agent: AgentID, seed=None, depth: int=sys.maxsize, name: str = None, transpositions: bool = False) -> None:
+        super().__init__(game, agent, name, seed)
 
         if depth < 0:
             raise ValueError("Depth must be a non-negative integer.")
 
         self.depth = depth
 
-        self.seed = seed
-        np.random.seed(seed)
+        # transposition table: value of the positions already searched by the current action(),
+        # indexed by (canonical key, remaining depth) so symmetric positions are searched once
+        self.transpositions = transpositions
+        self.table: dict[tuple[int, int], float] = {}
+        self._reset_counters()
     
     def action(self):
+        self.table = {}
+        self._reset_counters()
         act, _ = self.minimax(self.game, self.depth)
         return act
 
+    def _reset_counters(self) -> None:
+        # nodes searched (evaluated leaves included), deepest ply and transposition table use
+        self.counters = {'nodes': 0, 'max_depth': 0, 'cache_lookups': 0, 'cache_hits': 0}
+
     def minimax(self, game: AlternatingGame, depth: int):
 
         agent = game.agent_selection
         chosen_action = None  
+        counters = self.counters
+        counters['nodes'] += 1
+        if self.depth - depth > counters['max_depth']:
+            counters['max_depth'] = self.depth - depth
 
         #Casos base
 
@@ -36,7 +49,16 @@ class MiniMax(Agent):
         #Casos no base
 
         actions = game.available_actions()
-        np.random.shuffle(actions)
+        self.rng.shuffle(actions)
+
+        if depth == 1:
+            # every child is a leaf, evaluate them in a single batch
+            values = self.eval_children(game, actions)
+            counters['nodes'] += len(actions)
+            counters['max_depth'] = max(counters['max_depth'], self.depth - depth + 1)
+            best = np.argmin(values) if agent != self.agent else np.argmax(values)
+            return actions[best], values[best]
+
         action_nodes = []
         for action in actions:
             child = game.clone()
@@ -46,7 +68,7 @@ class MiniMax(Agent):
         if agent != self.agent: # Min
             value = float('inf')
             for action, child in action_nodes:
-                _, minimax_value = self.minimax(child, depth-1)
+                minimax_value = self._child_value(child, depth-1)
                 if minimax_value < value:
                     value = minimax_value
                     chosen_action = action
@@ -54,12 +76,26 @@ class MiniMax(Agent):
         else: # Max (player == self.player)
             value = float('-inf')
             for action, child in action_nodes:
-                _, minimax_value = self.minimax(child, depth-1)
+                minimax_value = self._child_value(child, depth-1)
                 if minimax_value > value:
                     value = minimax_value
                     chosen_action = action
 
         return chosen_action, value
 
+    def _child_value(self, child: AlternatingGame, depth: int) -> float:
+        if not self.transpositions:
+            return self.minimax(child, depth)[1]
+        key = (child.canonical_key()[0], depth)
+        self.counters['cache_lookups'] += 1
+        if key not in self.table:
+            self.table[key] = self.minimax(child, depth)[1]
+        else:
+            self.counters['cache_hits'] += 1
+        return self.table[key]
+
     def eval(self, game: AlternatingGame):
-        return game.eval(self.agent)
\ No newline at end of file
+        return game.eval(self.agent)
+
+    def eval_children(self, game: AlternatingGame, actions: list):
+        return game.eval_children(self.agent, actions)
\ No newline at end of file
@@ -0,0 +1,158 @@
+import numpy as np
+from base.game import AlternatingGame
+
+
+def masked_softmax(logits: np.ndarray, masks: np.ndarray) -> np.ndarray:
+    """Softmax of every row of logits over the entries where masks is True (the rest get 0)."""
+    logits = np.where(masks, logits, -np.inf)
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class PolicyValueNetwork:
+    """
+    Multilayer perceptron with a policy head and a value head, in NumPy.
+
+    The input is game.features(), the state seen by the agent to move. The policy head gives
+    the probability of every action (a softmax over the legal ones) and the value head the
+    expected reward of the agent to move, in [-1, 1]. Positions are evaluated in batches, one
+    matrix product per layer for the whole batch, and trained with Adam on the cross entropy
+    of the policy plus the squared error of the value.
+
+    Parameters:
+        num_features: length of game.features()
+        num_actions: number of actions of the game
+        hidden: sizes of the hidden ReLU layers (default: (64, 64))
+        learning_rate: Adam learning rate (default: 1e-3)
+        weight_decay: L2 penalty of the weights (default: 1e-4)
+        seed: seed of the initial weights (default: None)
+    """
+
+    def __init__(
+        self,
+        num_features: int,
+        num_actions: int,
+        hidden: tuple[int, ...] = (64, 64),
+        learning_rate: float = 1e-3,
+        weight_decay: float = 1e-4,
+        seed=None
+    ) -> None:
+        self.num_features = num_features
+        self.num_actions = num_actions
+        self.hidden = tuple(hidden)
+        self.learning_rate = learning_rate
+        self.weight_decay = weight_decay
+
+        # He initialization of the trunk, small heads so the first policies are almost uniform
+        rng = np.random.default_rng(seed)
+        sizes = [num_features, *self.hidden]
+        self.params: dict[str, np.ndarray] = {}
+        for i, (n_in, n_out) in enumerate(zip(sizes[:-1], sizes[1:])):
+            self.params[f'W{i}'] = rng.normal(0, np.sqrt(2 / n_in), (n_in, n_out)).astype(np.float32)
+            self.params[f'b{i}'] = np.zeros(n_out, dtype=np.float32)
+        self.params['Wp'] = rng.normal(0, 0.01, (sizes[-1], num_actions)).astype(np.float32)
+        self.params['bp'] = np.zeros(num_actions, dtype=np.float32)
+        self.params['Wv'] = rng.normal(0, 0.01, (sizes[-1], 1)).astype(np.float32)
+        self.params['bv'] = np.zeros(1, dtype=np.float32)
+
+        # Adam moments
+        self._m = {name: np.zeros_like(value) for name, value in self.params.items()}
+        self._v = {name: np.zeros_like(value) for name, value in self.params.items()}
+        self._t = 0
+
+        # positions evaluated and batches they were evaluated in
+        self.counters = {'evaluations': 0, 'batches': 0}
+
+    def _forward(self, features: np.ndarray) -> tuple[list[np.ndarray], np.ndarray, np.ndarray]:
+        activations = [features.astype(np.float32, copy=False)]
+        for i in range(len(self.hidden)):
+            pre = activations[-1] @ self.params[f'W{i}'] + self.params[f'b{i}']
+            activations.append(np.maximum(pre, 0))
+        logits = activations[-1] @ self.params['Wp'] + self.params['bp']
+        values = np.tanh(activations[-1] @ self.params['Wv'] + self.params['bv'])[:, 0]
+        return activations, logits, values
+
+    def predict(self, features: np.ndarray, masks: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Policies and values of a batch of positions.
+
+        Parameters:
+            features: (B, num_features) features of the positions
+            masks: (B, num_actions) legal actions of the positions
+        Returns:
+            (B, num_actions) probabilities of the actions and (B,) values for the agent to move
+        """
+        _, logits, values = self._forward(features)
+        self.counters['evaluations'] += len(features)
+        self.counters['batches'] += 1
+        return masked_softmax(logits, masks), values
+
+    def evaluate(self, games: list[AlternatingGame]) -> tuple[np.ndarray, np.ndarray]:
+        """predict() on the current positions of games, none of them over."""
+        features = np.stack([game.features() for game in games])
+        masks = np.stack([game.action_mask() for game in games])
+        return self.predict(features, masks)
+
+    def train_batch(
+        self,
+        features: np.ndarray,
+        masks: np.ndarray,
+        policies: np.ndarray,
+        values: np.ndarray
+    ) -> dict[str, float]:
+        """
+        One Adam step on a batch of positions with their target policies (search visit
+        distributions) and values (final rewards of the agent to move). Returns the losses.
+        """
+        n = len(features)
+        activations, logits, predicted = self._forward(features)
+        probabilities = masked_softmax(logits, masks)
+
+        # gradients of the mean losses with respect to the logits and the value pre-activations
+        grad_logits = (probabilities - policies) / n
+        grad_values = (2 * (predicted - values) * (1 - predicted ** 2) / n)[:, None]
+
+        last = activations[-1]
+        grads = {
+            'Wp': last.T @ grad_logits,
+            'bp': grad_logits.sum(axis=0),
+            'Wv': last.T @ grad_values,
+            'bv': grad_values.sum(axis=0),
+        }
+        grad = grad_logits @ self.params['Wp'].T + grad_values @ self.params['Wv'].T
+        for i in reversed(range(len(self.hidden))):
+            grad = grad * (activations[i + 1] > 0)
+            grads[f'W{i}'] = activations[i].T @ grad
+            grads[f'b{i}'] = grad.sum(axis=0)
+            grad = grad @ self.params[f'W{i}'].T
+        self._adam(grads)
+
+        with np.errstate(divide='ignore'):
+            log_probabilities = np.where(policies > 0, np.log(probabilities), 0.)
+        return {
+            'policy_loss': float(-(policies * log_probabilities).sum(axis=1).mean()),
+            'value_loss': float(((predicted - values) ** 2).mean()),
+        }
+
+    def _adam(self, grads: dict[str, np.ndarray], beta1: float = 0.9, beta2: float = 0.999, eps: float = 1e-8) -> None:
+        self._t += 1
+        for name, grad in grads.items():
+            if name.startswith('W'):
+                grad = grad + self.weight_decay * self.params[name]
+            self._m[name] = beta1 * self._m[name] + (1 - beta1) * grad
+            self._v[name] = beta2 * self._v[name] + (1 - beta2) * grad ** 2
+            m = self._m[name] / (1 - beta1 ** self._t)
+            v = self._v[name] / (1 - beta2 ** self._t)
+            self.params[name] -= (self.learning_rate * m / (np.sqrt(v) + eps)).astype(np.float32)
+
+    def save(self, path: str) -> None:
+        np.savez(path, hidden=np.array(self.hidden), **self.params)
+
+    @classmethod
+    def load(cls, path: str) -> 'PolicyValueNetwork':
+        data = np.load(path)
+        network = cls(data['W0'].shape[0], data['bp'].shape[0], hidden=tuple(data['hidden'].tolist()))
+        for name in network.params:
+            network.params[name] = data[name]
+        return network
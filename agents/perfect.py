@@ -0,0 +1,20 @@
+from base.game import AlternatingGame, AgentID
+from base.agent import Agent
+from games.tictactoe.solved import SolvedTicTacToe
+import numpy as np
+
+class PerfectAgent(Agent):
+    """Plays TicTacToe perfectly by looking up the solved game, ties are broken at random."""
+
+    def __init__(self, game: AlternatingGame, agent: AgentID, table: SolvedTicTacToe = None, seed=None, name: str = None) -> None:
+        super().__init__(game=game, agent=agent, name=name, seed=seed)
+        self.table = table if table is not None else SolvedTicTacToe.load()
+
+    def action(self):
+        return self.rng.choice(self.table.best_actions(self.game))
+
+    def policy(self):
+        best_actions = self.table.best_actions(self.game)
+        policy = np.zeros(self.game.num_actions(self.agent))
+        policy[best_actions] = 1 / len(best_actions)
+        return policy
@@ -1,17 +1,75 @@
+import time
+import numpy as np
 from base.game import AlternatingGame, AgentID
 
 class Agent():
 
-    def __init__(self, game:AlternatingGame, agent: AgentID, name: str = None) -> None:
+    def __init__(self, game:AlternatingGame, agent: AgentID, name: str = None, seed=None) -> None:
         self.game = game
         self.agent = agent
         self.name = name if name is not None else agent
+        self.set_seed(seed)
+        # search counters of the last call to action(), filled by the agents that search
+        self.counters: dict[str, int] = {}
+        self.reset_stats()
 
     def action(self):
         pass
 
     def policy(self):
         pass
-    
+
     def train(self, *kwargs) -> None:
         pass
+
+    def set_seed(self, seed=None) -> None:
+        # every agent draws its random choices from its own generator
+        self.rng = np.random.default_rng(seed)
+
+    def enable_stats(self, enabled: bool = True) -> None:
+        # while enabled every call to action() is timed and its counters are recorded,
+        # while disabled action() is not wrapped at all
+        if enabled:
+            self.action = self._timed_action
+        else:
+            self.__dict__.pop('action', None)
+
+    def reset_stats(self) -> None:
+        self._stats = {'calls': 0, 'time': 0., 'max_time': 0.}
+
+    def stats(self) -> dict:
+        """
+        Totals over the recorded calls to action(): number of calls, wall time and the
+        counters of the agent (nodes, rollouts, cache hits, ...). Keys starting with max_
+        hold maxima instead of totals, see merge_stats().
+        """
+        return dict(self._stats)
+
+    def _timed_action(self):
+        start = time.perf_counter()
+        action = type(self).action(self)
+        elapsed = time.perf_counter() - start
+        self._stats = merge_stats([self._stats, {'calls': 1, 'time': elapsed, 'max_time': elapsed, **self.counters}])
+        return action
+
+
+def seed_players(game: AlternatingGame, agents: list[Agent], seed) -> None:
+    """Gives the game and every agent their own generator, all derived from seed."""
+    seeds = np.random.SeedSequence(seed).spawn(1 + len(agents))
+    game.set_seed(seeds[0])
+    for agent, agent_seed in zip(agents, seeds[1:]):
+        agent.set_seed(agent_seed)
+
+
+def merge_stats(stats: list[dict]) -> dict:
+    """Adds up agent stats, the keys starting with max_ take the maximum."""
+    merged = {}
+    for entry in stats:
+        for key, value in entry.items():
+            if key not in merged:
+                merged[key] = value
+            elif key.startswith('max_'):
+                merged[key] = max(merged[key], value)
+            else:
+                merged[key] += value
+    return merged
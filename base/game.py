@@ -1,4 +1,5 @@
 import copy
+import numpy as np
 import pettingzoo.utils.env as env
 from pettingzoo.utils.env import AECEnv
 
@@ -18,6 +19,8 @@ class AlternatingGame(AECEnv):
 
     agent_name_mapping: dict[AgentID, int]
 
+    _action_mask: np.ndarray = None
+
     def observation_space(self, agent: AgentID):
         return self.observation_spaces[agent]
 
@@ -39,6 +42,10 @@ class AlternatingGame(AECEnv):
     def clone(self):
         game = copy.deepcopy(self)
         return game
+
+    def set_seed(self, seed=None) -> None:
+        # generator of the chance events of the game (deals, first player), shared with its clones
+        self.rng = np.random.default_rng(seed)
     
     def done(self):
         return self.terminations[self.agent_selection]
@@ -55,5 +62,50 @@ class AlternatingGame(AECEnv):
     def available_actions(self) -> list[ActionType]:
         pass
 
+    def state_key(self) -> int:
+        # integer identifying the state (hidden information included), used by caches and transposition tables
+        raise NotImplementedError(f"{type(self).__name__} does not implement state_key().")
+
+    def infoset_key(self, agent: AgentID) -> int:
+        # integer identifying what agent knows about the state, the state itself in perfect information games
+        return self.state_key()
+
+    def canonical_key(self) -> tuple[int, int]:
+        # smallest state key among the symmetric states and the symmetry mapping this state to it (0: identity)
+        return self.state_key(), 0
+
+    def canonical_action(self, action: ActionType, symmetry: int) -> ActionType:
+        # action of the state transformed by symmetry equivalent to action
+        return action
+
+    def original_action(self, action: ActionType, symmetry: int) -> ActionType:
+        # inverse of canonical_action
+        return action
+
+    def features(self) -> np.ndarray:
+        # flat float vector describing the state for the agent to move, the input of the networks
+        raise NotImplementedError(f"{type(self).__name__} does not implement features().")
+
+    def action_mask(self) -> np.ndarray:
+        # boolean mask of the available actions, the array is reused by the next call
+        mask = self._mask_buffer()
+        mask[:] = False
+        mask[self.available_actions()] = True
+        return mask
+
+    def _mask_buffer(self) -> np.ndarray:
+        if self._action_mask is None:
+            self._action_mask = np.zeros(self.num_actions(self.agent_selection), dtype=bool)
+        return self._action_mask
+
+    def eval_children(self, agent: AgentID, actions: list[ActionType]) -> np.ndarray:
+        # value of eval(agent) after each action, games can override it with a batched version
+        values = np.empty(len(actions))
+        for i, action in enumerate(actions):
+            child = self.clone()
+            child.step(action)
+            values[i] = child.eval(agent)
+        return values
+
 
 
@@ -0,0 +1,68 @@
+import numpy as np
+
+class SPRT():
+    """
+    Sequential probability ratio test on the scores of the games between two agents.
+
+    mu is the expected score of the first agent in a game (1 win, 0.5 draw, 0 loss), so draws
+    count as half a win. Two one sided tests run at the same time, H0: mu = 0.5 against
+    H1: mu = 0.5 + delta and against H1: mu = 0.5 - delta, each with half of the significance
+    level. The test stops when one of them accepts its H1 (one agent is better) or both
+    accept H0 (the agents are within delta of each other).
+
+    The log likelihood ratios are the normal approximation of the generalized SPRT: the score
+    variance is estimated from the games, so matchups with many draws (a small variance)
+    are decided sooner. The variance adds one pseudo game of each outcome, so a few equal
+    results do not stop the test at once.
+
+    Parameters:
+        alpha: significance level, probability of declaring a difference between equal agents (default: 0.05)
+        beta: probability of missing a difference of delta (default: 0.05)
+        delta: smallest difference of expected score worth detecting (default: 0.1)
+    """
+
+    def __init__(self, alpha: float = 0.05, beta: float = 0.05, delta: float = 0.1) -> None:
+        if not 0 < delta < 0.5:
+            raise ValueError("delta must be between 0 and 0.5.")
+        self.alpha = alpha
+        self.beta = beta
+        self.delta = delta
+        self.upper = np.log((1 - beta) / (alpha / 2))
+        self.lower = np.log(beta / (1 - alpha / 2))
+        self.wins = 0
+        self.losses = 0
+        self.draws = 0
+
+    def update(self, score: float) -> None:
+        """Adds a game, score is 1 (first agent wins), 0 (second agent wins) or 0.5 (draw)."""
+        if score > 0.5:
+            self.wins += 1
+        elif score < 0.5:
+            self.losses += 1
+        else:
+            self.draws += 1
+
+    def log_likelihood_ratios(self) -> tuple[float, float]:
+        # H1: mu = 0.5 + delta for the first agent, the second test swaps the agents
+        n = self.wins + self.draws + self.losses
+        if n == 0:
+            return 0., 0.
+        mean = (self.wins + 0.5 * self.draws) / n
+        counts = np.array([self.wins, self.draws, self.losses]) + 1
+        outcomes = np.array([1., 0.5, 0.])
+        prior_mean = counts @ outcomes / counts.sum()
+        variance = counts @ (outcomes - prior_mean) ** 2 / counts.sum()
+        first = n * self.delta * (2 * mean - 1 - self.delta) / (2 * variance)
+        second = n * self.delta * (1 - 2 * mean - self.delta) / (2 * variance)
+        return first, second
+
+    def decision(self) -> str | None:
+        """'first' or 'second' (the better agent), 'equal' or None while the test goes on."""
+        first, second = self.log_likelihood_ratios()
+        if first >= self.upper:
+            return 'first'
+        if second >= self.upper:
+            return 'second'
+        if first <= self.lower and second <= self.lower:
+            return 'equal'
+        return None
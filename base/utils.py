@@ -1,7 +1,18 @@
 from base.game import AlternatingGame
-from base.agent import Agent, AgentID
+from base.agent import Agent, AgentID, seed_players
+from base.vector_game import VectorGame, random_actions
+from typing import Callable
+import importlib
 import numpy as np
 
+
+def import_class(class_path: str):
+    """Import a class from a string path."""
+    module_path, class_name = class_path.rsplit('.', 1)
+    module = importlib.import_module(module_path)
+    return getattr(module, class_name)
+
+
 def play(game: AlternatingGame, agents: dict[AgentID, Agent]):
     game.reset()
     game.render()
@@ -26,3 +37,66 @@ def run(game: AlternatingGame, agents: dict[AgentID, Agent], N=100, verbose=Fals
         values.append(game.reward(game.agents[0]))
     v, c = np.unique(values, return_counts=True)
     return dict(zip(v, c)), np.mean(values)
+
+
+def play_game(game: AlternatingGame, players: dict[AgentID, Agent], seed=None) -> int:
+    """Plays a game between players (by agent id), all seeded from seed, returns its length."""
+    seed_players(game, [players[agent] for agent in game.agents], seed)
+    game.reset()
+    length = 0
+    while not game.game_over():
+        game.step(players[game.agent_selection].action())
+        length += 1
+    return length
+
+
+def outcome_score(reward: float, other_reward: float) -> float:
+    """Score of a reward against the reward of the opponent: 1 win, 0.5 draw, 0 loss."""
+    return 1. if reward > other_reward else 0. if reward < other_reward else 0.5
+
+
+def game_score(game: AlternatingGame, agent: AgentID) -> float:
+    """Score of agent in a finished game against the best other agent (see outcome_score)."""
+    return outcome_score(game.reward(agent), max(game.reward(other) for other in game.agents if other != agent))
+
+
+def play_match(
+    game: AlternatingGame,
+    player: Callable[[AgentID], Agent],
+    opponent: Callable[[AgentID], Agent],
+    n_games: int,
+    seed=None
+) -> list[float]:
+    """
+    Scores of player against opponent in n_games games of a two agent game, swapping who
+    moves first every game. player and opponent build the agent playing as an agent id,
+    game g is seeded with the g-th seed derived from seed.
+    """
+    scores = []
+    for g, game_seed in enumerate(np.random.SeedSequence(seed).generate_state(n_games).tolist()):
+        first, second = game.agents if g % 2 == 0 else list(reversed(game.agents))
+        play_game(game, {first: player(first), second: opponent(second)}, game_seed)
+        scores.append(game_score(game, first))
+    return scores
+
+
+def run_vector(
+    vgame: VectorGame,
+    policies: dict[AgentID, Callable[[VectorGame, np.ndarray], np.ndarray]] = None
+):
+    """
+    Plays vgame.num_envs games in lockstep. policies maps agents to functions returning an
+    action for every game given the vector game and its legal action mask (default: random).
+    """
+    vgame.reset()
+    while not vgame.done_mask().all():
+        mask = vgame.legal_action_mask()
+        actions = random_actions(mask, vgame.rng)
+        if policies is not None:
+            for agent, policy in policies.items():
+                turn = vgame.players == vgame.agent_name_mapping[agent]
+                actions = np.where(turn, policy(vgame, mask), actions)
+        vgame.step(actions)
+    values = vgame.rewards[:, 0]
+    v, c = np.unique(values, return_counts=True)
+    return dict(zip(v, c)), np.mean(values)
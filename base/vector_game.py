@@ -0,0 +1,70 @@
+import numpy as np
+from base.game import AlternatingGame, AgentID
+
+class VectorGame():
+    """
+    A batch of independent games of the same AlternatingGame played in lockstep.
+
+    The state of the B games is kept in stacked NumPy arrays, step() plays one action in
+    every game that is not over yet. Finished games stay finished until reset() is called
+    for them.
+
+    Attributes:
+        num_envs: number of games (B)
+        players: (B,) index of the agent to move in each game
+        rewards: (B, num_agents) rewards of each game, set once the game is over
+    """
+
+    def __init__(self, game: AlternatingGame, num_envs: int, seed=None) -> None:
+        self.game = game
+        self.num_envs = num_envs
+        self.agents = game.agents[:]
+        self.agent_name_mapping = dict(game.agent_name_mapping)
+        self.num_agents = len(self.agents)
+        self.num_actions = game.num_actions(self.agents[0])
+        self.rng = np.random.default_rng(seed)
+
+        self.players = np.zeros(num_envs, dtype=np.int8)
+        self.rewards = np.zeros((num_envs, self.num_agents))
+        self.terminations = np.zeros(num_envs, dtype=bool)
+        self.truncations = np.zeros(num_envs, dtype=bool)
+
+    def reset(self, mask: np.ndarray = None) -> None:
+        """Resets the games selected by the boolean mask (default: every game)."""
+        if mask is None:
+            mask = np.ones(self.num_envs, dtype=bool)
+        self.rewards[mask] = 0
+        self.terminations[mask] = False
+        self.truncations[mask] = False
+        self._reset(mask)
+
+    def _reset(self, mask: np.ndarray) -> None:
+        raise NotImplementedError
+
+    def step(self, actions: np.ndarray) -> None:
+        """Plays actions[b] in game b, actions of finished games are ignored."""
+        raise NotImplementedError
+
+    def legal_action_mask(self) -> np.ndarray:
+        """(B, num_actions) boolean mask of the legal actions of the agent to move in each game."""
+        raise NotImplementedError
+
+    def done_mask(self) -> np.ndarray:
+        """(B,) boolean mask of the finished games."""
+        return self.terminations | self.truncations
+
+    def agent_selection(self) -> list[AgentID]:
+        return [self.agents[p] for p in self.players]
+
+    def _check_legal(self, active: np.ndarray, actions: np.ndarray) -> None:
+        legal = self.legal_action_mask()[active, actions[active]]
+        if not legal.all():
+            env = np.flatnonzero(active)[np.argmin(legal)]
+            raise ValueError(f"Invalid action {actions[env]} in game {env} for agent {self.agents[self.players[env]]}.")
+
+
+def random_actions(mask: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Samples a legal action uniformly for every row of a (B, num_actions) mask."""
+    scores = rng.random(mask.shape)
+    scores[~mask] = -1.
+    return scores.argmax(axis=1)
@@ -0,0 +1,75 @@
+"""
+Import time benchmark
+
+Measures the time to import the entry points of the project in a fresh interpreter, the
+startup cost paid by every worker process, and checks it against a budget. Every entry
+point also has modules it must not import (plotting and progress bars are imported when
+they are used, games and agents when an experiment asks for them). Run it with:
+
+    python -m benchmarks.imports --repeats 5
+"""
+
+import sys
+import argparse
+import subprocess
+
+# module: (import time budget in milliseconds, top level packages it must not import)
+IMPORT_BUDGETS = {
+    'script_mcts_experiment': (500, ['matplotlib', 'tqdm', 'agents', 'games']),
+    'base.game': (400, ['matplotlib', 'tqdm']),
+    'games.tictactoe.tictactoe_native': (500, ['matplotlib', 'tqdm', 'agents']),
+    'games.nocca_nocca.nocca_nocca': (500, ['matplotlib', 'tqdm', 'agents']),
+    'agents.mcts': (500, ['matplotlib', 'tqdm', 'games']),
+}
+
+
+def bench_import(module: str, forbidden: list[str], repeats: int = 3) -> dict[str, float]:
+    # -X importtime reports the cumulative time of every import in microseconds, the
+    # interpreter startup is left out
+    code = f"import sys; import {module}; print(' '.join(sorted({{m.split('.')[0] for m in sys.modules}})))"
+    times = []
+    for _ in range(repeats):
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True, check=True
+        )
+        for line in process.stderr.splitlines():
+            fields = line.split('|')
+            if len(fields) == 3 and fields[2].strip() == module:
+                times.append(int(fields[1]) / 1000)
+        packages = set(process.stdout.split())
+    return {
+        'import ms': min(times),
+        'forbidden modules': len(packages & set(forbidden)),
+    }
+
+
+def bench_imports(repeats: int = 3) -> dict[str, dict[str, float]]:
+    return {
+        module: bench_import(module, forbidden, repeats)
+        for module, (_, forbidden) in IMPORT_BUDGETS.items()
+    }
+
+
+def over_budget(results: dict[str, dict[str, float]]) -> list[str]:
+    """Modules whose import time or imported packages break their budget."""
+    failures = []
+    for module, metrics in results.items():
+        budget, forbidden = IMPORT_BUDGETS[module]
+        if metrics['import ms'] > budget:
+            failures.append(f"{module} imports in {metrics['import ms']:.0f} ms, budget {budget} ms")
+        if metrics['forbidden modules']:
+            failures.append(f"{module} imports some of {', '.join(forbidden)}")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    results = bench_imports(args.repeats)
+    for module, metrics in results.items():
+        print(f"{module:>34} {metrics['import ms']:8.1f} ms (budget {IMPORT_BUDGETS[module][0]} ms)")
+    failures = over_budget(results)
+    for failure in failures:
+        print(f"Over budget: {failure}")
+    sys.exit(1 if failures else 0)
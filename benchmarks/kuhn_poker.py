@@ -0,0 +1,64 @@
+"""
+Kuhn Poker micro-benchmark
+
+Measures steps, observations and clones per second of KuhnPoker. Run it with:
+
+    python -m benchmarks.kuhn_poker --num-agents 2 --games 20000
+"""
+
+import time
+import argparse
+import numpy as np
+
+from games.kuhn import KuhnPoker
+
+
+def bench_steps(game: KuhnPoker, n_games: int = 20000, seed=None) -> dict[str, float]:
+    # the deals and the actions draw from their own generators derived from seed
+    game_seed, actions_seed = np.random.SeedSequence(seed).spawn(2)
+    game.set_seed(game_seed)
+    actions = np.random.default_rng(actions_seed).integers(game._num_actions, size=(n_games, game._max_moves)).tolist()
+
+    steps = 0
+    steps_time = 0.
+    start = time.perf_counter()
+    for game_actions in actions:
+        game.reset()
+        # resets are timed separately, they are dominated by dealing the cards
+        step_start = time.perf_counter()
+        for action in game_actions:
+            if game.done():
+                break
+            game.step(action)
+            steps += 1
+        steps_time += time.perf_counter() - step_start
+    reset_time = time.perf_counter() - start - steps_time
+
+    game.reset()
+    start = time.perf_counter()
+    for _ in range(n_games):
+        game.observe(game.agent_selection)
+    observe_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(n_games):
+        game.clone()
+    clone_time = time.perf_counter() - start
+
+    return {
+        'resets/sec': n_games / reset_time,
+        'steps/sec': steps / steps_time,
+        'observes/sec': n_games / observe_time,
+        'clones/sec': n_games / clone_time,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-agents", type=int, default=2)
+    parser.add_argument("--games", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    results = bench_steps(KuhnPoker(num_agents=args.num_agents), n_games=args.games, seed=args.seed)
+    for name, value in results.items():
+        print(f"{name:>14}: {value:,.0f}")
@@ -0,0 +1,109 @@
+"""
+Nocca Nocca evaluation benchmark
+
+Plays MiniMax with the heuristic evaluation of NoccaNocca against MiniMax searching one ply
+deeper with a zero evaluation (only wins and losses count), which was the evaluation of the
+game before, and reports the results and the time per move of each agent. Also measures the
+evaluation of all the children of a position, batched and one child at a time. Run it with:
+
+    python -m benchmarks.nocca_nocca_eval --games 20
+"""
+
+import time
+import argparse
+import numpy as np
+
+from base.game import AlternatingGame
+from base.agent import merge_stats
+from base.utils import play_match
+from agents.minimax import MiniMax
+from games.nocca_nocca.nocca_nocca import NoccaNocca
+from benchmarks.nocca_nocca_memory import mid_game
+
+
+class ZeroEvalMiniMax(MiniMax):
+    """MiniMax that values every non terminal position as a draw."""
+
+    def eval(self, game: AlternatingGame):
+        return game.reward(self.agent) if game.terminated() else 0.
+
+    def eval_children(self, game: AlternatingGame, actions: list):
+        values = np.empty(len(actions))
+        for i, action in enumerate(actions):
+            child = game.clone()
+            child.step(action)
+            values[i] = self.eval(child)
+        return values
+
+
+def minimax_match(first: tuple[type, int], second: tuple[type, int], n_games: int, max_steps: int, seed: int) -> dict[str, float]:
+    """
+    Plays n_games between two MiniMax agents, swapping colors every game.
+
+    first and second are (class, depth) pairs, the result has the score of the first agent
+    (1 win, 0.5 draw, 0 loss) and the time per move of each agent.
+    """
+    game = NoccaNocca(initial_player=0, max_steps=max_steps)
+    agents = {'first': [], 'second': []}
+
+    def builder(role: str, agent_class: type, depth: int):
+        # the agents record their time per move, see Agent.enable_stats
+        def build(agent_id):
+            agent = agent_class(game, agent_id, depth=depth)
+            agent.enable_stats()
+            agents[role].append(agent)
+            return agent
+        return build
+
+    scores = play_match(game, builder('first', *first), builder('second', *second), n_games, seed)
+    stats = {role: merge_stats([agent.stats() for agent in role_agents]) for role, role_agents in agents.items()}
+    return {
+        'score': float(np.mean(scores)),
+        'wins': sum(score == 1 for score in scores),
+        'draws': sum(score == 0.5 for score in scores),
+        'losses': sum(score == 0 for score in scores),
+        'first ms/move': 1000 * stats['first']['time'] / max(stats['first']['calls'], 1),
+        'second ms/move': 1000 * stats['second']['time'] / max(stats['second']['calls'], 1),
+    }
+
+
+def bench_eval_children(game: NoccaNocca, n: int = 200) -> dict[str, float]:
+    actions = game.available_actions()
+    agent = game.agent_selection
+    start = time.perf_counter()
+    for _ in range(n):
+        game.eval_children(agent, actions)
+    batched = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(n):
+        AlternatingGame.eval_children(game, agent, actions)
+    single = time.perf_counter() - start
+    return {
+        'children': len(actions),
+        'batched children/sec': n * len(actions) / batched,
+        'single children/sec': n * len(actions) / single,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--max-steps", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    matches = {
+        'eval depth 1 vs zero depth 2': ((MiniMax, 1), (ZeroEvalMiniMax, 2)),
+        'eval depth 2 vs zero depth 2': ((MiniMax, 2), (ZeroEvalMiniMax, 2)),
+        'eval depth 2 vs zero depth 3': ((MiniMax, 2), (ZeroEvalMiniMax, 3)),
+    }
+    for name, (first, second) in matches.items():
+        result = minimax_match(first, second, args.games, args.max_steps, args.seed)
+        print(
+            f"{name:>30}: score {result['score']:.2f} "
+            f"(+{result['wins']} ={result['draws']} -{result['losses']}), "
+            f"{result['first ms/move']:.1f} vs {result['second ms/move']:.1f} ms/move"
+        )
+
+    for name, value in bench_eval_children(mid_game()).items():
+        print(f"{name:>30}: {value:,.0f}")
@@ -0,0 +1,56 @@
+"""
+Nocca Nocca memory benchmark
+
+Measures the bytes allocated by each clone of a mid game NoccaNocca position and the clones
+per second (the cost paid by every MiniMax and MCTS node). Run it with:
+
+    python -m benchmarks.nocca_nocca_memory --clones 2000
+"""
+
+import time
+import argparse
+import tracemalloc
+import numpy as np
+
+from games.nocca_nocca.nocca_nocca import NoccaNocca
+
+
+def mid_game(n_moves: int = 10, seed: int = 0) -> NoccaNocca:
+    rng = np.random.default_rng(seed)
+    game = NoccaNocca(initial_player=0, seed=seed)
+    game.reset()
+    for _ in range(n_moves):
+        if game.game_over():
+            break
+        game.step(rng.choice(np.flatnonzero(game.action_mask())))
+    return game
+
+
+def bench_clones(game: NoccaNocca, n_clones: int = 2000) -> dict[str, float]:
+    # memory kept alive by the clones
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    clones = [game.clone() for _ in range(n_clones)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del clones
+
+    start = time.perf_counter()
+    for _ in range(n_clones):
+        game.clone()
+    clone_time = time.perf_counter() - start
+
+    return {
+        'bytes/clone': (after - before) / n_clones,
+        'board bytes': game.board.squares.nbytes + game.board.heights.nbytes,
+        'clones/sec': n_clones / clone_time,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clones", type=int, default=2000)
+    args = parser.parse_args()
+    results = bench_clones(mid_game(), n_clones=args.clones)
+    for name, value in results.items():
+        print(f"{name:>12} {value:>12,.0f}")
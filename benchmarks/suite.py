@@ -0,0 +1,266 @@
+"""
+Benchmark suite
+
+Measures the throughput of the games (resets, steps, clones, available actions and random
+playouts), of the agents at fixed settings (decisions, search nodes and CFR iterations per
+second), of the vector games, the memory of Nocca Nocca clones and the import time of the
+entry points. Results are written as JSON, and can be compared with a saved baseline, in
+which case every metric that got worse by more than the tolerance is reported as a
+regression (and the exit code is 1). Imports over their budget (see benchmarks.imports)
+fail the run even without a baseline. Run it with:
+
+    python -m benchmarks.suite --output benchmark.json
+    python -m benchmarks.suite --baseline benchmark.json --tolerance 0.2
+    python -m benchmarks.suite --quick --groups games agents
+"""
+
+import sys
+import json
+import time
+import platform
+import argparse
+import numpy as np
+
+from base.game import AlternatingGame
+from base.agent import Agent, seed_players
+from games.kuhn import KuhnPoker
+from games.kuhn_vector import VectorKuhnPoker
+from games.tictactoe.tictactoe import TicTacToe
+from games.tictactoe.tictactoe_native import NativeTicTacToe
+from games.tictactoe.tictactoe_vector import VectorTicTacToe
+from games.nocca_nocca.nocca_nocca import NoccaNocca
+from games.nocca_nocca.nocca_nocca_vector import VectorNoccaNocca
+from agents.minimax import MiniMax
+from agents.mcts import MonteCarloTreeSearch
+from agents.network import PolicyValueNetwork
+from agents.counterfactualregret import CounterFactualRegret
+from benchmarks.vector_games import bench_vector_game
+from benchmarks.nocca_nocca_memory import mid_game, bench_clones
+from benchmarks.imports import bench_imports, over_budget
+
+GROUPS = ['games', 'agents', 'vector', 'memory', 'imports']
+
+# metrics checked against the fixed budgets of benchmarks.imports instead of the baseline,
+# import times of single runs vary too much for a relative tolerance
+BUDGET_METRICS = {'import ms', 'forbidden modules'}
+
+
+def bench_game(game: AlternatingGame, n_games: int, seed=None) -> dict[str, float]:
+    # random playouts with resets, steps and available actions timed apart, the game and the
+    # playout moves draw from their own generators derived from seed
+    game_seed, playout_seed = np.random.SeedSequence(seed).spawn(2)
+    game.set_seed(game_seed)
+    rng = np.random.default_rng(playout_seed)
+    reset_time = steps_time = actions_time = 0.
+    steps = 0
+    start = time.perf_counter()
+    for _ in range(n_games):
+        t = time.perf_counter()
+        game.reset()
+        reset_time += time.perf_counter() - t
+        while not game.game_over():
+            t = time.perf_counter()
+            actions = game.available_actions()
+            actions_time += time.perf_counter() - t
+            action = actions[rng.integers(len(actions))]
+            t = time.perf_counter()
+            game.step(action)
+            steps_time += time.perf_counter() - t
+            steps += 1
+    playouts_time = time.perf_counter() - start
+
+    # clones of a position after the first move
+    game.reset()
+    game.step(game.available_actions()[0])
+    start = time.perf_counter()
+    for _ in range(n_games):
+        game.clone()
+    clone_time = time.perf_counter() - start
+
+    return {
+        'resets/sec': n_games / reset_time,
+        'steps/sec': steps / steps_time,
+        'available_actions/sec': steps / actions_time,
+        'clones/sec': n_games / clone_time,
+        'playouts/sec': n_games / playouts_time,
+    }
+
+
+def bench_decisions(agent: Agent, n_decisions: int, seed=None) -> dict[str, float]:
+    # decisions from the initial position of the game of the agent, nodes are counted by the agent stats
+    seed_players(agent.game, [agent], seed)
+    agent.game.reset()
+    agent.enable_stats()
+    start = time.perf_counter()
+    for _ in range(n_decisions):
+        agent.action()
+    elapsed = time.perf_counter() - start
+    metrics = {
+        'decisions/sec': n_decisions / elapsed,
+        'nodes/sec': agent.stats()['nodes'] / elapsed,
+    }
+    if 'simulations' in agent.stats():
+        metrics['simulations/sec'] = agent.stats()['simulations'] / elapsed
+    return metrics
+
+
+def bench_agents(scale: float, seed=None) -> dict[str, dict[str, float]]:
+    results = {}
+
+    game = NativeTicTacToe()
+    minimax = MiniMax(game, game.agents[0], depth=4)
+    results['MiniMax/TicTacToe/depth4'] = bench_decisions(minimax, max(1, int(20 * scale)), seed)
+
+    game = NoccaNocca(initial_player=0, max_steps=100)
+    minimax = MiniMax(game, game.agents[0], depth=2)
+    results['MiniMax/NoccaNocca/depth2'] = bench_decisions(minimax, max(1, int(5 * scale)), seed)
+
+    game = NativeTicTacToe()
+    mcts = MonteCarloTreeSearch(game, game.agents[0], simulations=100)
+    results['MCTS/TicTacToe/100sims'] = bench_decisions(mcts, max(1, int(20 * scale)), seed)
+
+    game = NoccaNocca(initial_player=0, max_steps=100)
+    mcts = MonteCarloTreeSearch(game, game.agents[0], simulations=20)
+    results['MCTS/NoccaNocca/20sims'] = bench_decisions(mcts, max(1, int(2 * scale)), seed)
+
+    game = NoccaNocca(initial_player=0, max_steps=100)
+    mcts = MonteCarloTreeSearch(game, game.agents[0], simulations=100, rollout_depth=10)
+    results['MCTS/NoccaNocca/100sims/rollout10'] = bench_decisions(mcts, max(1, int(2 * scale)), seed)
+
+    game = NoccaNocca(initial_player=0, max_steps=100)
+    mcts = MonteCarloTreeSearch(game, game.agents[0], simulations=100, rollout_depth=10, widening=1)
+    results['MCTS/NoccaNocca/100sims/rollout10/widening'] = bench_decisions(mcts, max(1, int(2 * scale)), seed)
+
+    # untrained network, measures the search and the batched evaluations, not the play
+    game = NoccaNocca(initial_player=0, max_steps=100)
+    game.reset()
+    network = PolicyValueNetwork(len(game.features()), len(game.action_mask()), seed=seed)
+    mcts = MonteCarloTreeSearch(game, game.agents[0], simulations=400, evaluator=network, batch_size=8)
+    results['MCTS/NoccaNocca/400sims/network'] = bench_decisions(mcts, max(1, int(5 * scale)), seed)
+
+    game = KuhnPoker()
+    cfr = CounterFactualRegret(game, game.agents[0])
+    seed_players(game, [cfr], seed)
+    game.reset()
+    iterations = max(1, int(500 * scale))
+    start = time.perf_counter()
+    cfr.train(iterations)
+    results['CFR/KuhnPoker'] = {'iterations/sec': iterations / (time.perf_counter() - start)}
+
+    return results
+
+
+def run_suite(groups: list[str], scale: float = 1., seed=None) -> dict[str, dict[str, float]]:
+    results = {}
+    if 'games' in groups:
+        games = {
+            'KuhnPoker': (KuhnPoker(), 20000),
+            'TicTacToe': (TicTacToe(), 500),
+            'NativeTicTacToe': (NativeTicTacToe(), 5000),
+            'NoccaNocca': (NoccaNocca(max_steps=100), 100),
+        }
+        for name, (game, n_games) in games.items():
+            results[f'games/{name}'] = bench_game(game, max(1, int(n_games * scale)), seed)
+    if 'agents' in groups:
+        for name, metrics in bench_agents(scale, seed).items():
+            results[f'agents/{name}'] = metrics
+    if 'vector' in groups:
+        envs = max(1, int(10000 * scale))
+        vgames = {
+            'KuhnPoker': VectorKuhnPoker(KuhnPoker(), envs, seed=seed),
+            'TicTacToe': VectorTicTacToe(NativeTicTacToe(), envs, seed=seed),
+            'NoccaNocca': VectorNoccaNocca(NoccaNocca(max_steps=100), envs, seed=seed),
+        }
+        for name, vgame in vgames.items():
+            results[f'vector/{name}'] = bench_vector_game(vgame)
+    if 'memory' in groups:
+        results['memory/NoccaNocca'] = bench_clones(mid_game(seed=seed), n_clones=max(1, int(2000 * scale)))
+    if 'imports' in groups:
+        for module, metrics in bench_imports(repeats=max(1, int(5 * scale))).items():
+            results[f'imports/{module}'] = metrics
+    return results
+
+
+def lower_is_better(metric: str) -> bool:
+    # rates (per second) should go up, sizes and times should go down
+    return not metric.endswith('/sec')
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Regressions of results with respect to baseline, metrics missing in either one and
+    metrics with a fixed budget (BUDGET_METRICS) are skipped.
+    """
+    regressions = []
+    for bench, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline.get(bench, {}).get(metric)
+            if old is None or old == 0 or metric in BUDGET_METRICS:
+                continue
+            change = value / old - 1
+            worse = change > tolerance if lower_is_better(metric) else change < -tolerance
+            if worse:
+                regressions.append(f"{bench} {metric}: {old:,.1f} -> {value:,.1f} ({change:+.0%})")
+    return regressions
+
+
+def print_results(results: dict, baseline: dict = None) -> None:
+    for bench, metrics in results.items():
+        print(bench)
+        for metric, value in metrics.items():
+            line = f"  {metric:>22}: {value:>14,.1f}"
+            old = (baseline or {}).get(bench, {}).get(metric)
+            if old:
+                line += f"  ({value / old - 1:+.0%})"
+            print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--groups", nargs='+', choices=GROUPS, default=GROUPS)
+    parser.add_argument("--quick", action='store_true', help="run a tenth of the work, for smoke tests")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, default=None, help="JSON file to write the results to")
+    parser.add_argument("--baseline", type=str, default=None, help="JSON results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative change allowed before a regression")
+    args = parser.parse_args()
+
+    results = run_suite(args.groups, scale=0.1 if args.quick else 1., seed=args.seed)
+
+    baseline = None
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)['results']
+    print_results(results, baseline)
+
+    if args.output is not None:
+        report = {
+            'meta': {
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'platform': platform.platform(),
+                'quick': args.quick,
+            },
+            'results': results,
+        }
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"Results saved to {args.output}")
+
+    imports = {bench[len('imports/'):]: metrics for bench, metrics in results.items() if bench.startswith('imports/')}
+    failures = over_budget(imports)
+    for failure in failures:
+        print(f"Over budget: {failure}")
+
+    regressions = []
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regressions (tolerance {args.tolerance:.0%}):")
+            for regression in regressions:
+                print(f"  {regression}")
+        else:
+            print("No regressions")
+    if regressions or failures:
+        sys.exit(1)
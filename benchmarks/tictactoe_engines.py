@@ -0,0 +1,70 @@
+"""
+TicTacToe engines benchmark
+
+Compares the pettingzoo based TicTacToe with NativeTicTacToe on steps, clones, heuristic
+evaluations and random playouts per second. Run it with:
+
+    python -m benchmarks.tictactoe_engines --games 2000
+"""
+
+import time
+import argparse
+import numpy as np
+
+from base.game import AlternatingGame
+from games.tictactoe.tictactoe import TicTacToe
+from games.tictactoe.tictactoe_native import NativeTicTacToe
+
+
+def bench_engine(game: AlternatingGame, n_games: int = 2000, seed=None) -> dict[str, float]:
+    # random playouts with the move choice timed apart from the engine
+    rng = np.random.default_rng(seed)
+    steps = 0
+    steps_time = 0.
+    start = time.perf_counter()
+    for _ in range(n_games):
+        game.reset()
+        while not game.terminated():
+            action = rng.choice(game.available_actions())
+            step_start = time.perf_counter()
+            game.step(action)
+            steps_time += time.perf_counter() - step_start
+            steps += 1
+    playouts_time = time.perf_counter() - start
+
+    # clones of a mid game position
+    game.reset()
+    for action in [4, 0, 8]:
+        game.step(action)
+    start = time.perf_counter()
+    for _ in range(n_games):
+        game.clone()
+    clone_time = time.perf_counter() - start
+
+    # heuristic evaluations of the same position
+    start = time.perf_counter()
+    for _ in range(n_games):
+        game.eval(game.agent_selection)
+    eval_time = time.perf_counter() - start
+
+    return {
+        'steps/sec': steps / steps_time,
+        'clones/sec': n_games / clone_time,
+        'evals/sec': n_games / eval_time,
+        'playouts/sec': n_games / playouts_time,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    results = {
+        'TicTacToe': bench_engine(TicTacToe(), n_games=args.games, seed=args.seed),
+        'NativeTicTacToe': bench_engine(NativeTicTacToe(), n_games=args.games, seed=args.seed),
+    }
+    print(f"{'':>14} {'TicTacToe':>12} {'Native':>12} {'speedup':>8}")
+    for name in results['TicTacToe']:
+        old, new = results['TicTacToe'][name], results['NativeTicTacToe'][name]
+        print(f"{name:>14} {old:>12,.0f} {new:>12,.0f} {new / old:>7.1f}x")
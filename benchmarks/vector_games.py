@@ -0,0 +1,47 @@
+"""
+Vector games benchmark
+
+Random playouts of every VectorGame, reporting steps and games per second. Run it with:
+
+    python -m benchmarks.vector_games --envs 10000
+"""
+
+import time
+import argparse
+
+from base.vector_game import VectorGame, random_actions
+from games.kuhn import KuhnPoker
+from games.kuhn_vector import VectorKuhnPoker
+from games.tictactoe.tictactoe_native import NativeTicTacToe
+from games.tictactoe.tictactoe_vector import VectorTicTacToe
+from games.nocca_nocca.nocca_nocca import NoccaNocca
+from games.nocca_nocca.nocca_nocca_vector import VectorNoccaNocca
+
+
+def bench_vector_game(vgame: VectorGame) -> dict[str, float]:
+    steps = 0
+    start = time.perf_counter()
+    vgame.reset()
+    while not vgame.done_mask().all():
+        steps += vgame.num_envs - vgame.done_mask().sum()
+        vgame.step(random_actions(vgame.legal_action_mask(), vgame.rng))
+    elapsed = time.perf_counter() - start
+    return {
+        'steps/sec': steps / elapsed,
+        'games/sec': vgame.num_envs / elapsed,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--envs", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    vgames = {
+        'KuhnPoker': VectorKuhnPoker(KuhnPoker(), args.envs, seed=args.seed),
+        'TicTacToe': VectorTicTacToe(NativeTicTacToe(), args.envs, seed=args.seed),
+        'NoccaNocca': VectorNoccaNocca(NoccaNocca(max_steps=100), args.envs, seed=args.seed),
+    }
+    for name, vgame in vgames.items():
+        results = bench_vector_game(vgame)
+        print(f"{name:>10}: " + ", ".join(f"{value:,.0f} {metric}" for metric, value in results.items()))
@@ -0,0 +1,307 @@
+import copy
+import numpy as np
+from numpy import ndarray
+from gymnasium.spaces import Discrete, Text, Dict
+from base.game import AlternatingGame, AgentID, ActionType
+
+class GeneralizedKuhnPoker(AlternatingGame):
+    """
+    Kuhn/Leduc family of poker games.
+
+    Every player antes and gets one private card. In each betting round players act in turn,
+    the first bet of the round opens it and the remaining active players call or fold. A round
+    ends once every active player acted after the last bet (or everybody passed). Before every
+    round but the first one a public card is revealed. The pot is split among the active players
+    with the best hand: pairing a public card beats not pairing it, then the highest rank wins.
+
+    Terminal states and payoffs are derived from these rules instead of enumerated, so the
+    number of players, ranks, suits and rounds can be scaled freely. With the default
+    parameters the game is the 2-player Kuhn Poker of games/kuhn.py, and with
+    num_cards=3, num_suits=2, num_rounds=2, bet_sizes=[2, 4] it is a Leduc-style game
+    (without raises).
+
+    Parameters:
+        num_agents: number of players (default: 2)
+        num_cards: number of ranks in the deck (default: num_agents + 1)
+        num_suits: number of copies of each rank in the deck (default: 1)
+        num_rounds: number of betting rounds (default: 1)
+        bet_sizes: size of the bet in each round (default: 1, 2, 4, ...)
+        ante: chips put in the pot by each player before the deal (default: 1)
+    """
+
+    def __init__(
+        self,
+        num_agents: int = 2,
+        num_cards: int = None,
+        num_suits: int = 1,
+        num_rounds: int = 1,
+        bet_sizes: list[int] = None,
+        ante: int = 1,
+        initial_player: int = 0,
+        seed=None,
+        render_mode='human'
+    ):
+        self.render_mode = render_mode
+
+        self.seed = seed
+        self.set_seed(seed)
+
+        self.agents = []
+        self.players = []
+        for agent in range(num_agents):
+            self.agents.append(f"agent_{agent+1}")
+            self.players.append(agent)
+
+        self.initial_player = initial_player
+
+        self.possible_agents = self.agents[:]
+        self.agent_name_mapping = dict(zip(self.agents, list(range(self.num_agents))))
+        self.agent_selection = None
+
+        # deck: card c has rank c // num_suits
+        self._num_cards = num_cards if num_cards is not None else num_agents + 1
+        self._num_suits = num_suits
+        self._num_rounds = num_rounds
+        self._deck_size = self._num_cards * self._num_suits
+        if self._deck_size < self.num_agents + self._num_rounds - 1:
+            raise ValueError(
+                f"A deck of {self._deck_size} cards is too small for {self.num_agents} players and {self._num_rounds} rounds."
+            )
+        self._card_names = [str(rank) for rank in range(self._num_cards)]
+        self._card_space = Discrete(self._num_cards)
+
+        # betting
+        self._ante = ante
+        self._bet_sizes = bet_sizes if bet_sizes is not None else [2 ** r for r in range(num_rounds)]
+        if len(self._bet_sizes) != self._num_rounds:
+            raise ValueError(f"Expected {self._num_rounds} bet sizes, got {len(self._bet_sizes)}.")
+
+        # actions
+        self._moves = ['p', 'b']
+        self._num_actions = 2
+        self.action_spaces = {
+            agent: Discrete(self._num_actions) for agent in self.agents
+        }
+        # every action is always available
+        self._all_actions = np.ones(self._num_actions, dtype=bool)
+        self._all_actions.flags.writeable = False
+
+        # observations: private rank followed by the history, where every round after the
+        # first one starts with '/' and the rank of the revealed public card
+        self._round_separator = '/'
+        self._start = ''
+        self._max_moves = self._num_rounds * (2 * self.num_agents - 1)
+        charset = frozenset(self._moves + self._card_names + [self._round_separator])
+        self._hist_space = Text(min_length=0, max_length=self._max_moves * 3, charset=charset)
+        # keys: the history is a number in base num_cards + 3 with a digit per move (1 + action)
+        # or revealed rank (3 + rank), the deal is a number in base deck size with a digit per dealt card
+        self._key_base = self._num_cards + 3
+        self._num_dealt = self.num_agents + self._num_rounds - 1
+        self._num_deals = self._deck_size ** self._num_dealt
+        self.observation_spaces = {
+            agent: Dict({ 'card': self._card_space, 'hist': self._hist_space}) for agent in self.agents
+        }
+        self.terminations = {agent: False for agent in self.agents}
+
+    def step(self, action: ActionType) -> None:
+        agent = self.agent_selection
+        # check for termination
+        if (self.terminations[agent] or self.truncations[agent]):
+            try:
+                self._was_dead_step(action)
+            except ValueError:
+                print('Game has already finished - Call reset if you want to play again')
+                return
+
+        # perform step
+        player = self._player
+        self._hist += self._moves[action]
+        self._hist_key = self._hist_key * self._key_base + 1 + action
+        if action == 1:
+            self._contributions[player] += self._bet_sizes[self._round]
+            if not self._bet:
+                # open the round, every other active player has to respond
+                self._bet = True
+                self._pending = self._num_active - 1
+            else:
+                # call
+                self._pending -= 1
+        else:
+            if self._bet:
+                # fold
+                self._active[player] = False
+                self._num_active -= 1
+            self._pending -= 1
+
+        if self._num_active == 1:
+            self._compute_rewards()
+        elif self._pending == 0:
+            if self._round == self._num_rounds - 1:
+                self._compute_rewards()
+            else:
+                self._next_round()
+        else:
+            self._player = self._next_active(player)
+            self.agent_selection = self.agents[self._player]
+
+    def _next_active(self, player: int) -> int:
+        player = (player + 1) % self.num_agents
+        while not self._active[player]:
+            player = (player + 1) % self.num_agents
+        return player
+
+    def _next_round(self) -> None:
+        self._round += 1
+        public_card = self._deck[self.num_agents + self._round - 1]
+        self._public.append(public_card)
+        self._hist += self._round_separator + self._card_names[self._rank(public_card)]
+        self._hist_key = self._hist_key * self._key_base + 3 + self._rank(public_card)
+        self._bet = False
+        self._pending = self._num_active
+        self._player = self.initial_player
+        if not self._active[self._player]:
+            self._player = self._next_active(self._player)
+        self.agent_selection = self.agents[self._player]
+
+    def _rank(self, card: int) -> int:
+        return card // self._num_suits
+
+    def _strength(self, card: int) -> int:
+        rank = self._rank(card)
+        pairs = sum(self._rank(public_card) == rank for public_card in self._public)
+        return pairs * self._num_cards + rank
+
+    def _compute_rewards(self) -> None:
+        pot = sum(self._contributions)
+        active = [p for p in self.players if self._active[p]]
+        strengths = [self._strength(self._hand[p]) for p in active]
+        best = max(strengths)
+        winners = [p for p, s in zip(active, strengths) if s == best]
+        share = pot / len(winners)
+        _rewards = [
+            (share if p in winners else 0) - self._contributions[p] for p in self.players
+        ]
+        self.rewards = dict(zip(self.agents, _rewards))
+        self.terminations = dict.fromkeys(self.agents, True)
+
+    def _set_initial(self):
+        # set initial history
+        self._hist = self._start
+        self._hist_key = 0
+        self._round = 0
+        self._public = []
+
+        # shuffle the deck, the first cards are the private ones followed by the public ones
+        self._set_deck(self.rng.permutation(self._deck_size))
+
+        # betting state
+        self._active = [True] * self.num_agents
+        self._num_active = self.num_agents
+        self._contributions = [self._ante] * self.num_agents
+        self._bet = False
+        self._pending = self.num_agents
+
+        self._player = self.initial_player
+        self.agent_selection = self.agents[self._player]
+
+    def _set_deck(self, deck: ndarray) -> None:
+        self._deck = deck
+        self._hand = deck[:self.num_agents]
+        self._deal_key = 0
+        for card in reversed(deck[:self._num_dealt].tolist()):
+            self._deal_key = self._deal_key * self._deck_size + card
+
+    def reset(self, seed: int | None = None, options: dict | None = None) -> None:
+        if seed is not None:
+            self.set_seed(seed)
+        self._set_initial()
+
+        self.rewards = dict(map(lambda agent: (agent, None), self.agents))
+        self.terminations = dict(map(lambda agent: (agent, False), self.agents))
+        self.truncations = dict(map(lambda agent: (agent, False), self.agents))
+        self.infos = dict(map(lambda agent: (agent, {}), self.agents))
+
+    def render(self) -> ndarray | str | list | None:
+        for agent in self.agents:
+            print(agent, self._card_names[self._rank(self._hand[self.agent_name_mapping[agent]])], self._hist)
+
+    def observe(self, agent: AgentID) -> str:
+        observation = self._card_names[self._rank(self._hand[self.agent_name_mapping[agent]])] + self._hist
+        return observation
+
+    def available_actions(self):
+        return list(range(self._num_actions))
+
+    def action_mask(self) -> np.ndarray:
+        return self._all_actions
+
+    def state_key(self) -> int:
+        return self._hist_key * self._num_deals + self._deal_key
+
+    def infoset_key(self, agent: AgentID) -> int:
+        # the private rank of the agent and the history, as observe()
+        return self._hist_key * self._num_cards + self._rank(self._hand[self.agent_name_mapping[agent]])
+
+    def random_change(self, agent: AgentID):
+        # resample every card the agent can not see: the other hands and the unrevealed public cards
+        agent_idx = self.agent_name_mapping[agent]
+        new_game = self.clone()
+        deck = self._deck.copy()
+        hidden = [i for i in range(self._deck_size) if i != agent_idx and not (
+            self.num_agents <= i < self.num_agents + len(self._public)
+        )]
+        deck[hidden] = self.rng.permutation(self._deck[hidden])
+        new_game._set_deck(deck)
+        return new_game
+
+    def clone(self):
+        game = copy.copy(self)
+        game._public = self._public.copy()
+        game._active = self._active.copy()
+        game._contributions = self._contributions.copy()
+        game.rewards = self.rewards.copy()
+        game.terminations = self.terminations.copy()
+        game.truncations = self.truncations.copy()
+        game.infos = dict(map(lambda agent: (agent, {}), self.agents))
+        return game
+
+    def action_move(self, action: ActionType) -> str:
+        if action not in range(self._num_actions):
+            raise ValueError(f"{action} is not a legal action.")
+
+        return self._moves[action]
+
+    def eval(self, agent: AgentID):
+        """Evaluation function for minimax."""
+        if self.game_over():
+            return self.reward(agent)
+        # Simple heuristic: stronger hand is better
+        return self._strength(self._hand[self.agent_name_mapping[agent]]) / (self._num_cards * self._num_rounds)
+
+    def count_infosets(self) -> int:
+        """Number of information sets of the game (for every player)."""
+        self.reset()
+        decisions = self._count_decisions(self.clone())
+        return sum(count * self._count_rank_sequences(r + 1) for r, count in enumerate(decisions))
+
+    def _count_decisions(self, game: 'GeneralizedKuhnPoker') -> list[int]:
+        # number of decision nodes of the betting tree for each round, the tree does not depend on the cards
+        decisions = [0] * self._num_rounds
+        if game.game_over():
+            return decisions
+        decisions[game._round] += 1
+        for action in game.available_actions():
+            child = game.clone()
+            child.step(action)
+            for r, count in enumerate(self._count_decisions(child)):
+                decisions[r] += count
+        return decisions
+
+    def _count_rank_sequences(self, length: int, used: tuple[int, ...] = ()) -> int:
+        # sequences of ranks (private rank followed by the public ranks) that can be dealt
+        if len(used) == length:
+            return 1
+        return sum(
+            self._count_rank_sequences(length, used + (rank,))
+            for rank in range(self._num_cards) if used.count(rank) < self._num_suits
+        )
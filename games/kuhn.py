@@ -1,6 +1,7 @@
+import copy
+from itertools import permutations
 import numpy as np
 from numpy import ndarray
-from numpy import random
 from gymnasium.spaces import Discrete, Text, Dict, Tuple
 from base.game import AlternatingGame, AgentID, ActionType
 
@@ -10,7 +11,7 @@ class KuhnPoker(AlternatingGame):
         self.render_mode = render_mode
 
         self.seed = seed
-        random.seed(seed)
+        self.set_seed(seed)
 
         self.agents = []
         self.players = []
@@ -31,6 +32,9 @@ class KuhnPoker(AlternatingGame):
         self.action_spaces = {
             agent: Discrete(self._num_actions) for agent in self.agents
         }
+        # every action is always available
+        self._all_actions = np.ones(self._num_actions, dtype=bool)
+        self._all_actions.flags.writeable = False
 
         # states
         self._max_moves = 3
@@ -54,6 +58,9 @@ class KuhnPoker(AlternatingGame):
         self._card_space = Discrete(self._num_cards)
         self._hand = None
 
+        # precomputed tables (histories, transitions, observations and payoffs)
+        self._build_tables()
+
         # observations
         self.observation_spaces = {
             agent: Dict({ 'card': self._card_space, 'hist': self._hist_space}) for agent in self.agents
@@ -71,25 +78,64 @@ class KuhnPoker(AlternatingGame):
                 return
 
         # perform step
-        self._hist += self._moves[action]
+        self._hist_id = self._transitions[self._hist_id][action]
+        self._hist = self._hist_names[self._hist_id]
         self._player = (self._player + 1) % self.num_agents
         self.agent_selection = self.agents[self._player]
 
         self._compute_rewards()
 
     def _compute_rewards(self):
-        if self.num_agents == 2:
-            self._compute_rewards_2()
-        elif self.num_agents == 3:
-            self._compute_rewards_3()
+        if self._terminal[self._hist_id]:
+            _rewards = self._payoffs[self._hist_id][self._deal_id]
+            self.rewards = dict(zip(self.agents, _rewards))
+            self.terminations = dict.fromkeys(self.agents, True)
+
+    def _build_tables(self):
+        # histories are enumerated breadth first, the id of a history is its index
+        self._hist_names = [self._start]
+        self._hist_ids = {self._start: 0}
+        transitions = []
+        for hist in self._hist_names:
+            next_ids = [-1] * self._num_actions
+            if hist not in self._terminalset and len(hist) < self._max_moves:
+                for action, move in enumerate(self._moves):
+                    next_hist = hist + move
+                    if next_hist not in self._hist_ids:
+                        self._hist_ids[next_hist] = len(self._hist_names)
+                        self._hist_names.append(next_hist)
+                    next_ids[action] = self._hist_ids[next_hist]
+            transitions.append(tuple(next_ids))
+        self._transitions = transitions
+        self._terminal = [hist in self._terminalset for hist in self._hist_names]
+
+        # every possible deal of cards to the players
+        self._deals = list(permutations(self._cards, self.num_agents))
+        self._deal_ids = dict(map(lambda x: (x[1], x[0]), enumerate(self._deals)))
+
+        # observation of a player holding a card at a given history
+        self._obs_table = [
+            [str(card) + hist for hist in self._hist_names] for card in self._cards
+        ]
+
+        # payoffs of every player for each (terminal history, deal)
+        compute_payoffs = self._payoffs_2 if self.num_agents == 2 else self._payoffs_3
+        self._payoffs = [
+            [compute_payoffs(hist, deal) if terminal else None for deal in self._deals]
+            for hist, terminal in zip(self._hist_names, self._terminal)
+        ]
+
+    def _set_hand(self, hand: ndarray) -> None:
+        self._hand = hand
+        self._deal_id = self._deal_ids[tuple(hand.tolist())]
 
     def _set_initial(self):
         # set initial history
+        self._hist_id = 0
         self._hist = self._start
 
         # deal a card to each player
-        random.seed(self.seed)
-        self._hand = random.choice(self._cards, size=self.num_agents, replace=False)      
+        self._set_hand(self.rng.choice(self._cards, size=self.num_agents, replace=False))
 
         # reset agent selection
         if self.initial_player is None:
@@ -101,6 +147,8 @@ class KuhnPoker(AlternatingGame):
 
         
     def reset(self, seed: int | None = None, options: dict | None = None) -> None:
+        if seed is not None:
+            self.set_seed(seed)
         self._set_initial()
 
         self.rewards = dict(map(lambda agent: (agent, None), self.agents))
@@ -113,22 +161,44 @@ class KuhnPoker(AlternatingGame):
             print(agent, self._card_names[self._hand[self.agent_name_mapping[agent]]], self._hist)
 
     def observe(self, agent: AgentID) -> str:
-        observation = str(self._hand[self.agent_name_mapping[agent]]) + self._hist
+        observation = self._obs_table[self._hand[self.agent_name_mapping[agent]]][self._hist_id]
         return observation
     
     def available_actions(self):
         return list(range(self._num_actions))
+
+    def action_mask(self) -> np.ndarray:
+        return self._all_actions
+
+    def state_key(self) -> int:
+        return self._deal_id * len(self._hist_names) + self._hist_id
+
+    def infoset_key(self, agent: AgentID) -> int:
+        # the card of the agent and the history, as observe()
+        return self._hand[self.agent_name_mapping[agent]] * len(self._hist_names) + self._hist_id
     
     def random_change(self, agent: AgentID):
+        # deal the cards the agent can not see again to every other player
         agent_idx = self.agent_name_mapping[agent]
         agent_card = self._hand[agent_idx]
-        other_idx = 1 - agent_idx 
+        other_idx = [i for i in range(self.num_agents) if i != agent_idx]
         other_cards = self._cards.copy()
         other_cards.pop(agent_card)
         new_game = self.clone()
-        new_game._hand[other_idx] = np.random.choice(other_cards)
+        new_hand = new_game._hand.copy()
+        new_hand[other_idx] = self.rng.choice(other_cards, size=len(other_idx), replace=False)
+        new_game._set_hand(new_hand)
         return new_game
 
+    def clone(self):
+        # the precomputed tables are shared, only the state of the game is copied
+        game = copy.copy(self)
+        game.rewards = self.rewards.copy()
+        game.terminations = self.terminations.copy()
+        game.truncations = self.truncations.copy()
+        game.infos = dict(map(lambda agent: (agent, {}), self.agents))
+        return game
+
     def action_move(self, action: ActionType) -> str:
         if action not in range(self._num_actions):
             raise ValueError(f"{action} is not a legal action.")
@@ -142,29 +212,22 @@ class KuhnPoker(AlternatingGame):
         # Simple heuristic: higher card is better
         return self._hand[self.agent_name_mapping[agent]] / self._num_cards
 
-    def _compute_rewards_2(self):
-        if self._hist in self._terminalset:
-            # game over - compute rewards
-            if self._hist == 'pp':
-                # pass pass
-                _rewards = list(map(lambda p: 1 if p == np.argmax(self._hand) else -1, range(self.num_agents))) 
-            elif self._hist == 'pbp':
-                # pass bet pass
-                _rewards = list(map(lambda p: 1 if p == 1 else -1, range(self.num_agents)))
-            elif self._hist == 'bp':
-                # bet pass
-                _rewards = list(map(lambda p: 1 if p == 0 else -1, range(self.num_agents))) 
-            else:
-                # pass bet bet OR bet bet
-                _rewards = list(map(lambda p: 2 if p == np.argmax(self._hand) else -2, range(self.num_agents)))              
-        
-            self.rewards = dict(map(lambda p: (p, _rewards[self.agent_name_mapping[p]]), self.agents))
-            self.terminations = dict(map(lambda p: (p, True), self.agents))
-    
-    def _compute_rewards_3(self):
-        if self._hist not in self._terminalset:
-            return
-
+    def _payoffs_2(self, hist: str, hand: tuple[int, ...]) -> list[int]:
+        winner = np.argmax(hand)
+        if hist == 'pp':
+            # pass pass
+            return list(map(lambda p: 1 if p == winner else -1, range(self.num_agents)))
+        elif hist == 'pbp':
+            # pass bet pass
+            return list(map(lambda p: 1 if p == 1 else -1, range(self.num_agents)))
+        elif hist == 'bp':
+            # bet pass
+            return list(map(lambda p: 1 if p == 0 else -1, range(self.num_agents)))
+        else:
+            # pass bet bet OR bet bet
+            return list(map(lambda p: 2 if p == winner else -2, range(self.num_agents)))
+
+    def _payoffs_3(self, hist: str, hand: tuple[int, ...]) -> list[int]:
         # Default payoff values
         pot = 3  # 1 ante from each
         contributions = [1] * self.num_agents  # Starting from ante
@@ -173,7 +236,7 @@ class KuhnPoker(AlternatingGame):
         # Determine contributions and active players based on actions
         turn = self.initial_player
 
-        for move in self._hist:
+        for move in hist:
             if move == 'b':
                 contributions[turn] += 1
                 pot += 1
@@ -193,18 +256,16 @@ class KuhnPoker(AlternatingGame):
 
         elif num_active == 3:
             # All called to showdown
-            winner = np.argmax([card for i, card in enumerate(self._hand)])
+            winner = np.argmax(hand)
             for i in range(self.num_agents):
                 rewards[i] = pot - contributions[i] if i == winner else -contributions[i]
 
         elif num_active == 2:
             # One player folded, showdown between two
             indices = [i for i, a in enumerate(active) if a]
-            hands = [self._hand[i] for i in indices]
+            hands = [hand[i] for i in indices]
             winner = indices[np.argmax(hands)]
             for i in range(self.num_agents):
                 rewards[i] = pot - contributions[i] if i == winner else -contributions[i]
 
-        # Apply to game
-        self.rewards = dict((f"agent_{i+1}", rewards[i]) for i in range(self.num_agents))
-        self.terminations = dict((f"agent_{i+1}", True) for i in range(self.num_agents))
\ No newline at end of file
+        return rewards
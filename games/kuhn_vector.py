@@ -0,0 +1,40 @@
+import numpy as np
+from base.vector_game import VectorGame
+from games.kuhn import KuhnPoker
+
+class VectorKuhnPoker(VectorGame):
+    """B games of KuhnPoker played with its precomputed history and payoff tables."""
+
+    def __init__(self, game: KuhnPoker, num_envs: int, seed=None) -> None:
+        super().__init__(game, num_envs, seed)
+        self.transitions = np.array(game._transitions)
+        self.terminal = np.array(game._terminal)
+        self.payoffs = np.zeros((len(game._hist_names), len(game._deals), self.num_agents))
+        for hist_id, deal_payoffs in enumerate(game._payoffs):
+            if self.terminal[hist_id]:
+                self.payoffs[hist_id] = deal_payoffs
+        self.num_deals = len(game._deals)
+        self.hands = np.array(game._deals)
+
+        self.hist = np.zeros(num_envs, dtype=np.int64)
+        self.deal = np.zeros(num_envs, dtype=np.int64)
+        self.reset()
+
+    def _reset(self, mask: np.ndarray) -> None:
+        self.hist[mask] = 0
+        self.deal[mask] = self.rng.integers(self.num_deals, size=np.count_nonzero(mask))
+        self.players[mask] = self.game.initial_player
+
+    def legal_action_mask(self) -> np.ndarray:
+        mask = np.ones((self.num_envs, self.num_actions), dtype=bool)
+        mask[self.done_mask()] = False
+        return mask
+
+    def step(self, actions: np.ndarray) -> None:
+        active = np.flatnonzero(~self.done_mask())
+        self.hist[active] = self.transitions[self.hist[active], actions[active]]
+        self.players[active] = (self.players[active] + 1) % self.num_agents
+
+        ended = active[self.terminal[self.hist[active]]]
+        self.rewards[ended] = self.payoffs[self.hist[ended], self.deal[ended]]
+        self.terminations[ended] = True
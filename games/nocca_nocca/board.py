@@ -20,11 +20,31 @@ Coords: TypeAlias = tuple[int, int]
 class Board:
 
     def __init__(self):
-        self.squares = np.ndarray((ROWS, COLS, MAX_STACK))
-        self.squares.fill(EMPTY)
+        # owner of every piece of each stack (bottom first) and number of pieces of each stack
+        self.squares = np.full((ROWS, COLS, MAX_STACK), EMPTY, dtype=np.int8)
+        self.heights = np.zeros((ROWS, COLS), dtype=np.int8)
         for y in range(COLS):
             self.squares[BLACK_START][y][0] = BLACK
             self.squares[WHITE_START][y][0] = WHITE
+        self.heights[[BLACK_START, WHITE_START]] = 1
+        self._key = board_key(self.squares, self.heights)
+        self._mirror_key = board_key(self.squares[:, ::-1], self.heights[:, ::-1])
+
+    def copy(self) -> "Board":
+        board = Board.__new__(Board)
+        board.squares = self.squares.copy()
+        board.heights = self.heights.copy()
+        board._key = self._key
+        board._mirror_key = self._mirror_key
+        return board
+
+    def key(self) -> int:
+        # integer encoding of the board, updated by play_turn (see board_key)
+        return self._key
+
+    def mirror_key(self) -> int:
+        # key of the board mirrored left to right
+        return self._mirror_key
 
     @staticmethod
     def _opponent(player: Player) -> Player:
@@ -33,16 +53,11 @@ class Board:
         return BLACK
 
     def _check_player_blocked(self, player: Player) -> bool:
-        player_squares = np.argwhere(self.squares == player)
-        for x, y, k in player_squares:
-            stack = self.squares[x][y]
-            opponent_pieces = np.argwhere(stack == Board._opponent(player)).tolist()
-            player_blocked = len(opponent_pieces) != 0 and any(
-                h > k for h in opponent_pieces
-            )
-            if not player_blocked:
-                return False
-        return True
+        # only the pieces on top of a stack are free
+        return not (self._top_pieces() == player).any()
+
+    def _top_pieces(self) -> np.ndarray:
+        return top_pieces(self.squares, self.heights)
 
     @staticmethod
     def _map_action_to_new_pos(action: Action) -> Coords:
@@ -69,81 +84,94 @@ class Board:
         return self.check_for_winner() is not None
 
     def check_for_winner(self) -> Player:
+        top = self._top_pieces()
         # check if a white piece reached the goal or if all black pieces are blocked
-        if any(
-            x == WHITE for x in self.squares[WHITE_GOAL][:].T[0]
-        ) or self._check_player_blocked(BLACK):
+        if (self.squares[WHITE_GOAL, :, 0] == WHITE).any() or not (top == BLACK).any():
             return WHITE
         # check if a black piece reached the goal or if all white pieces are blocked
-        elif any(
-            x == BLACK for x in self.squares[BLACK_GOAL][:].T[0]
-        ) or self._check_player_blocked(WHITE):
+        elif (self.squares[BLACK_GOAL, :, 0] == BLACK).any() or not (top == WHITE).any():
             return BLACK
         else:
             return None
 
     def play_turn(self, player: Player, action: Action) -> None:
         (x, y, _) = action
-        # take the highest player piece off the tower
-        if self.squares[x][y][2] == player:
-            self.squares[x][y][2] = EMPTY
-        elif self.squares[x][y][1] == player:
-            self.squares[x][y][1] = EMPTY
-        else:
-            self.squares[x][y][0] = EMPTY
+        # take the player piece off the top of the tower
+        height = int(self.heights[x, y])
+        self.squares[x, y, height - 1] = EMPTY
+        self.heights[x, y] = height - 1
+        delta = (1 + player) << (height - 1)
+        self._key -= delta << KEY_BITS * (x * COLS + y)
+        self._mirror_key -= delta << KEY_BITS * (x * COLS + COLS - 1 - y)
 
-        # put the piece in the correct square
+        # put the piece on top of the new square (replacing the top piece of a full tower)
         new_x, new_y = Board._map_action_to_new_pos(action)
-        if self.squares[new_x][new_y][0] == EMPTY:
-            self.squares[new_x][new_y][0] = player
-        elif self.squares[new_x][new_y][1] == EMPTY:
-            self.squares[new_x][new_y][1] = player
+        height = int(self.heights[new_x, new_y])
+        if height < MAX_STACK:
+            self.squares[new_x, new_y, height] = player
+            self.heights[new_x, new_y] = height + 1
+            delta = (1 + player) << height
         else:
-            self.squares[new_x][new_y][2] = player
+            replaced = int(self.squares[new_x, new_y, MAX_STACK - 1])
+            self.squares[new_x, new_y, MAX_STACK - 1] = player
+            delta = (player - replaced) << (MAX_STACK - 1)
+        self._key += delta << KEY_BITS * (new_x * COLS + new_y)
+        self._mirror_key += delta << KEY_BITS * (new_x * COLS + COLS - 1 - new_y)
 
     def legal_moves(self, player: Player) -> list[Action]:
-        legal_moves = []
-        player_squares = np.argwhere(self.squares == player)
-        for square in player_squares:
-            for move in MOVES:
-                action = (square[0], square[1], move)
-                is_legal_move, _ = self.is_legal_move(player, action)
-                if is_legal_move:
-                    legal_moves.append(action)
-        return legal_moves
+        return [ACTIONS[action] for action in self.legal_actions(player)]
+
+    def legal_actions(self, player: Player) -> np.ndarray:
+        # indices of the legal actions, as NoccaNocca actions
+        return np.flatnonzero(self.action_mask(player))
+
+    def action_mask(self, player: Player, out: np.ndarray = None) -> np.ndarray:
+        # boolean mask of the legal actions of player, indexed as NoccaNocca actions
+        movable = self._top_pieces() == player
+        if out is None:
+            out = np.empty(ROWS * COLS * len(MOVES), dtype=bool)
+        np.logical_and(movable[..., None], LEGAL_DIRECTIONS[player], out=out.reshape((ROWS, COLS, len(MOVES))))
+        return out
 
     def is_legal_move(self, player: Player, action: Action) -> tuple[bool, str]:
+        (x, y, move) = action
+        height = self.heights[x, y]
+        if height > 0 and self.squares[x, y, height - 1] == player and LEGAL_DIRECTIONS[player, x, y, MOVE_INDEX[move]]:
+            return (True, "Legal move")
+        return (False, self._illegal_move_reason(player, action))
+
+    def _illegal_move_reason(self, player: Player, action: Action) -> str:
         (x, y, move) = action
         # check if there is a piece in position x, y
         stack = self.squares[x][y]
         if all(x != player for x in stack):
-            return (False, f"There are no player pieces in position ({x},{y})")
+            return f"There are no player pieces in position ({x},{y})"
         # check if the piece is blocked
         player_squares = np.argwhere(stack == player).tolist()
         opponent_squares = np.argwhere(stack == Board._opponent(player)).tolist()
         if player_squares != []:
             max_pos = max(player_squares)
             if any(h > max_pos for h in opponent_squares):
-                return (
-                    False,
-                    f"Player pieces in position ({x}, {y}) are blocked by an opponent piece",
-                )
+                return f"Player pieces in position ({x}, {y}) are blocked by an opponent piece"
         # check if move is legal
         if x in [WHITE_GOAL, BLACK_GOAL]:
-            return (False, "Game already over")
+            return "Game already over"
         if (x == BLACK_START and player == BLACK and move in ["N", "NW", "NE"]) or (
             x == WHITE_START and player == WHITE and move in ["S", "SW", "SE"]
         ):
-            return (False, "Cannot move into your own goal")
+            return "Cannot move into your own goal"
         if (y == 0 and move in ["W", "NW", "SW"]) or (
             y == 4 and move in ["E", "NE", "SE"]
         ):
-            return (False, "Cannot move out of bounds")
+            return "Cannot move out of bounds"
         # missing check for destination tower height
-        return (True, "Legal move")
+        return "Legal move"
 
     def set_board(self, board: "Board") -> None:
         self.squares = np.copy(board.squares)
+        self.heights = np.copy(board.heights)
+        self._key = board_key(self.squares, self.heights)
+        self._mirror_key = board_key(self.squares[:, ::-1], self.heights[:, ::-1])
     
     def render(self):
         # rendering a stack of pieces
@@ -157,4 +185,124 @@ class Board:
             print(f"{x}: ", end="")
             for y in range(COLS):
                 print(stack_to_str(self.squares[x, y, :]), end="")
-            print()
\ No newline at end of file
+            print()
+
+
+# board action of every NoccaNocca action index and index of every move
+ACTIONS: list[Action] = [(x, y, move) for x in range(ROWS) for y in range(COLS) for move in MOVES]
+MOVE_INDEX = {move: m for m, move in enumerate(MOVES)}
+
+# MIRROR_ACTIONS[action]: the same action on the board mirrored left to right (its own inverse)
+MIRROR_MOVES = {"N": "N", "S": "S", "W": "E", "E": "W", "SW": "SE", "NW": "NE", "SE": "SW", "NE": "NW"}
+MIRROR_ACTIONS = [
+    ACTIONS.index((x, COLS - 1 - y, MIRROR_MOVES[move])) for (x, y, move) in ACTIONS
+]
+
+# row and column offsets of each move
+MOVE_DELTAS = np.array([
+    Board._map_action_to_new_pos((0, 0, move)) for move in MOVES
+])
+
+# LEGAL_DIRECTIONS[player, x, y, move]: the move is allowed for a piece of player on (x, y)
+LEGAL_DIRECTIONS = np.ones((2, ROWS, COLS, len(MOVES)), dtype=bool)
+for m, move in enumerate(MOVES):
+    # cannot move out of bounds
+    if move in ["W", "NW", "SW"]:
+        LEGAL_DIRECTIONS[:, :, 0, m] = False
+    if move in ["E", "NE", "SE"]:
+        LEGAL_DIRECTIONS[:, :, COLS - 1, m] = False
+    # cannot move into your own goal
+    if move in ["N", "NW", "NE"]:
+        LEGAL_DIRECTIONS[BLACK, BLACK_START, :, m] = False
+    if move in ["S", "SW", "SE"]:
+        LEGAL_DIRECTIONS[WHITE, WHITE_START, :, m] = False
+# pieces on the goal rows cannot move, the game is already over
+LEGAL_DIRECTIONS[:, [WHITE_GOAL, BLACK_GOAL]] = False
+
+
+# bits used by the code of a stack in a board key
+KEY_BITS = 4
+
+
+def board_key(squares: np.ndarray, heights: np.ndarray) -> int:
+    """
+    Integer encoding of a board. A stack of height h with white pieces at levels i has code
+    2^h - 1 + sum(2^i), between 0 and 14, and the square (x, y) takes the KEY_BITS bits of
+    the key starting at bit KEY_BITS * (x * COLS + y). Moving a piece changes two codes, so
+    Board.play_turn updates the key with two additions.
+    """
+    levels = np.arange(MAX_STACK)
+    white = ((squares == WHITE) << levels).sum(axis=-1)
+    codes = ((1 << heights.astype(np.int64)) - 1 + white).flatten().tolist()
+    return sum(code << (KEY_BITS * square) for square, code in enumerate(codes))
+
+
+def top_pieces(squares: np.ndarray, heights: np.ndarray) -> np.ndarray:
+    """Owner of the topmost piece of every stack (EMPTY for empty squares)."""
+    levels = np.maximum(heights - 1, 0)[..., None].astype(np.intp)
+    top = np.take_along_axis(squares, levels, axis=-1)[..., 0]
+    return np.where(heights > 0, top, EMPTY)
+
+
+def legal_action_masks(squares: np.ndarray, heights: np.ndarray, players: np.ndarray) -> np.ndarray:
+    """
+    Legal actions of a batch of boards.
+
+    Parameters:
+        squares: (B, ROWS, COLS, MAX_STACK) owner of each piece (EMPTY if there is none)
+        heights: (B, ROWS, COLS) number of pieces in each stack
+        players: (B,) player to move in each board
+    Returns:
+        (B, ROWS * COLS * len(MOVES)) boolean mask indexed as NoccaNocca actions
+    """
+    # only a stack topped by a piece of the player can move (otherwise it is blocked)
+    movable = top_pieces(squares, heights) == players[:, None, None]
+    mask = movable[..., None] & LEGAL_DIRECTIONS[players]
+    return mask.reshape(len(players), -1)
+
+
+def play_actions(
+    squares: np.ndarray,
+    heights: np.ndarray,
+    boards: np.ndarray,
+    actions: np.ndarray,
+    players: np.ndarray
+) -> None:
+    """
+    Plays an action on some boards of a batch, in place, like Board.play_turn (a full stack
+    gets its top piece replaced). The actions are not checked.
+
+    Parameters:
+        squares: (B, ROWS, COLS, MAX_STACK) owner of each piece (EMPTY if there is none)
+        heights: (B, ROWS, COLS) number of pieces in each stack
+        boards: (N,) indices of the boards to play on
+        actions: (N,) NoccaNocca action played on each board
+        players: (N,) player making each action
+    """
+    # take the top piece off the source stack
+    x, y, move = actions // (COLS * len(MOVES)), (actions // len(MOVES)) % COLS, actions % len(MOVES)
+    height = heights[boards, x, y]
+    squares[boards, x, y, height - 1] = EMPTY
+    heights[boards, x, y] = height - 1
+
+    # put it on top of the destination stack
+    new_x, new_y = x + MOVE_DELTAS[move, 0], y + MOVE_DELTAS[move, 1]
+    height = heights[boards, new_x, new_y]
+    squares[boards, new_x, new_y, np.minimum(height, MAX_STACK - 1)] = players
+    heights[boards, new_x, new_y] = np.minimum(height + 1, MAX_STACK)
+
+
+def blocked_players(top: np.ndarray) -> np.ndarray:
+    """
+    (B, 2) whether every piece of each player has an opponent piece above it, that is, no
+    stack is topped by one of its pieces. top is the (B, ROWS, COLS) result of top_pieces.
+    """
+    return np.stack([~(top == player).any(axis=(1, 2)) for player in [BLACK, WHITE]], axis=1)
+
+
+def winners(squares: np.ndarray, heights: np.ndarray) -> np.ndarray:
+    """(B,) winner of each board (EMPTY if there is none yet), checked in the same order as Board."""
+    blocked = blocked_players(top_pieces(squares, heights))
+    white_wins = (squares[:, WHITE_GOAL, :, 0] == WHITE).any(axis=1) | blocked[:, BLACK]
+    black_wins = (squares[:, BLACK_GOAL, :, 0] == BLACK).any(axis=1) | blocked[:, WHITE]
+    return np.where(white_wins, WHITE, np.where(black_wins, BLACK, EMPTY))
@@ -0,0 +1,100 @@
+import numpy as np
+from games.nocca_nocca.board import BLACK, WHITE, EMPTY, ROWS, COLS, MAX_STACK, MOVES
+from games.nocca_nocca.board import BLACK_START, WHITE_START, BLACK_GOAL, WHITE_GOAL
+from games.nocca_nocca.board import top_pieces, legal_action_masks, play_actions, winners
+
+# PROGRESS[player, x]: progress of a piece of player on row x toward its goal row, 0 on the
+# start row (or behind it) and 1 on the goal row
+PROGRESS = np.zeros((2, ROWS))
+PROGRESS[BLACK] = np.clip((np.arange(ROWS) - BLACK_START) / (BLACK_GOAL - BLACK_START), 0, 1)
+PROGRESS[WHITE] = np.clip((WHITE_START - np.arange(ROWS)) / (WHITE_START - WHITE_GOAL), 0, 1)
+
+# weight of each term, every term is a difference between the players in [-1, 1] and the
+# weights add up to less than 1 so no position is valued like a win
+ADVANCEMENT_WEIGHT = 0.4
+CONTROL_WEIGHT = 0.2
+BLOCKED_WEIGHT = 0.2
+MOBILITY_WEIGHT = 0.1
+
+
+def player_features(squares: np.ndarray, heights: np.ndarray, top: np.ndarray, player: int) -> np.ndarray:
+    """
+    (B, 4) advancement, stack control, blocked pieces and mobility of player, each in [0, 1].
+
+    Advancement averages the progress of all the pieces of player with the progress of its
+    most advanced free piece (the next one to reach the goal). Stack control counts the
+    stacks topped by player that hold other pieces, blocked pieces counts the pieces of
+    player with an opponent piece above them and mobility counts its legal moves.
+    """
+    pieces = squares == player
+    progress = PROGRESS[player][None, :, None]
+    mean_progress = (pieces.sum(axis=-1) * progress).sum(axis=(1, 2)) / COLS
+    free = top == player
+    free_progress = np.where(free, progress, 0.).max(axis=(1, 2))
+    advancement = (mean_progress + free_progress) / 2
+
+    control = (free & (heights > 1)).sum(axis=(1, 2)) / COLS
+
+    # opponent piece on some level above each level
+    opponent = (squares == 1 - player)[..., ::-1]
+    above = np.logical_or.accumulate(opponent, axis=-1)[..., ::-1]
+    covered = np.zeros_like(above)
+    covered[..., :MAX_STACK - 1] = above[..., 1:]
+    blocked = (pieces & covered).sum(axis=(1, 2, 3)) / COLS
+
+    players = np.full(len(squares), player)
+    mobility = legal_action_masks(squares, heights, players).sum(axis=1) / (COLS * len(MOVES))
+    return np.stack([advancement, control, blocked, mobility], axis=1)
+
+
+def evaluate_boards(squares: np.ndarray, heights: np.ndarray, players: np.ndarray) -> np.ndarray:
+    """
+    Heuristic value of a batch of boards for a player, between -0.9 and 0.9.
+
+    Parameters:
+        squares: (B, ROWS, COLS, MAX_STACK) owner of each piece (EMPTY if there is none)
+        heights: (B, ROWS, COLS) number of pieces in each stack
+        players: (B,) player the value is computed for
+    """
+    top = top_pieces(squares, heights)
+    difference = player_features(squares, heights, top, BLACK) - player_features(squares, heights, top, WHITE)
+    weights = np.array([ADVANCEMENT_WEIGHT, CONTROL_WEIGHT, -BLOCKED_WEIGHT, MOBILITY_WEIGHT])
+    black_values = difference @ weights
+    return np.where(players == BLACK, black_values, -black_values)
+
+
+def evaluate_children(
+    squares: np.ndarray,
+    heights: np.ndarray,
+    actions: list[int],
+    mover: int,
+    player: int,
+    truncated: bool
+) -> np.ndarray:
+    """
+    Value of the boards reached by playing each action, for player.
+
+    Children with a winner get the reward of player (1 win, -1 loss), the rest get the
+    heuristic value of evaluate_boards, or 0 (a draw) when the move reaches the step limit.
+
+    Parameters:
+        squares: (ROWS, COLS, MAX_STACK) owner of each piece of the board
+        heights: (ROWS, COLS) number of pieces in each stack of the board
+        actions: NoccaNocca actions of the player to move
+        mover: player to move
+        player: player the values are computed for
+        truncated: whether the move reaches the step limit of the game
+    """
+    n = len(actions)
+    children_squares = np.repeat(squares[None], n, axis=0)
+    children_heights = np.repeat(heights[None], n, axis=0)
+    play_actions(children_squares, children_heights, np.arange(n), np.asarray(actions), np.full(n, mover))
+
+    if truncated:
+        values = np.zeros(n)
+    else:
+        values = evaluate_boards(children_squares, children_heights, np.full(n, player))
+    winner = winners(children_squares, children_heights)
+    values[winner == player] = 1.
+    values[(winner != player) & (winner != EMPTY)] = -1.
+    return values
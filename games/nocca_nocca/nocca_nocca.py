@@ -1,10 +1,17 @@
-import random
+import copy
+import numpy as np
 from itertools import product
 from gymnasium.spaces import Discrete, Tuple
 from base.game import AlternatingGame, AgentID, ActionType
 from games.nocca_nocca.board import Board, MOVES, MAX_STACK, ROWS, COLS
 from games.nocca_nocca.board import Player, BLACK, WHITE
-from games.nocca_nocca.board import Action
+from games.nocca_nocca.board import Action, MIRROR_ACTIONS
+from games.nocca_nocca.evaluation import evaluate_boards, evaluate_children
+
+# board action of every action index and action index of every board action, shared by every game
+ACTION_BOARD_DICT: dict[ActionType, Action] = dict(enumerate(product(range(ROWS), range(COLS), MOVES)))
+BOARD_ACTION_DICT: dict[Action, ActionType] = {board_action: action for action, board_action in ACTION_BOARD_DICT.items()}
+ACTION_LIST: list[ActionType] = list(ACTION_BOARD_DICT.keys())
 
 class NoccaNocca(AlternatingGame):
     def __init__(self, initial_player=None, max_steps=None, seed=None, render_mode='human'):
@@ -21,7 +28,7 @@ class NoccaNocca(AlternatingGame):
         self.initial_player = initial_player
         self.max_steps = max_steps
         self.seed = seed
-        random.seed(seed)
+        self.set_seed(seed)
 
         # board
         self.board = None
@@ -35,20 +42,56 @@ class NoccaNocca(AlternatingGame):
         self.agent_selection = None
 
         # actions
-        self.action_board_dict = dict(map(lambda x: x, enumerate((product(range(ROWS), range(COLS), MOVES)))))
-        self.board_action_dict = dict(map(lambda x: (x[1], x[0]), self.action_board_dict.items()))
-        self.action_list = list(self.action_board_dict.keys())
+        self.action_board_dict = ACTION_BOARD_DICT
+        self.board_action_dict = BOARD_ACTION_DICT
+        self.action_list = ACTION_LIST
         self.n_actions = len(self.action_list)
         self.action_spaces = {agent: Discrete(self.n_actions) for agent in self.agents}
 
         # observations
         self.observation_spaces = {agent: Discrete(self.n_actions) for agent in self.agents}
 
+    @property
+    def observations(self) -> dict[AgentID, np.ndarray]:
+        return {agent: self.observe(agent) for agent in self.agents}
+
+    def observe(self, agent: AgentID) -> np.ndarray:
+        # read-only view of the board (it changes with the next step, copy it to keep it)
+        observation = self.board.squares.view()
+        observation.flags.writeable = False
+        return observation
+
+    def features(self) -> np.ndarray:
+        # pieces of the player to move and of the opponent on every level, and the color to move
+        player = self.agent_name_mapping[self.agent_selection]
+        squares = self.board.squares
+        return np.concatenate([
+            (squares == player).ravel(), (squares == 1 - player).ravel(), [player]
+        ]).astype(np.float32)
+
+    def state_key(self) -> int:
+        # board key followed by a bit with the player to move (the step count is not included)
+        return self.board.key() << 1 | self.agent_name_mapping[self.agent_selection]
+
+    def canonical_key(self) -> tuple[int, int]:
+        # the board and its left to right mirror (symmetry 1)
+        key = self.state_key()
+        mirror_key = self.board.mirror_key() << 1 | self.agent_name_mapping[self.agent_selection]
+        return (key, 0) if key <= mirror_key else (mirror_key, 1)
+
+    def canonical_action(self, action: ActionType, symmetry: int) -> ActionType:
+        return MIRROR_ACTIONS[action] if symmetry else action
+
+    def original_action(self, action: ActionType, symmetry: int) -> ActionType:
+        return MIRROR_ACTIONS[action] if symmetry else action
+
     def available_actions(self) -> list[ActionType]:
         player = self.agent_name_mapping[self.agent_selection]
-        board_actions = self.board.legal_moves(player=player)
-        actions = list(map(lambda x: self.board_action_dict[x], board_actions))
-        return actions
+        return self.board.legal_actions(player=player).tolist()
+
+    def action_mask(self) -> np.ndarray:
+        player = self.agent_name_mapping[self.agent_selection]
+        return self.board.action_mask(player=player, out=self._mask_buffer())
     
     def step(self, action: ActionType) -> None:
         
@@ -83,8 +126,6 @@ class NoccaNocca(AlternatingGame):
             next_player = self.board._opponent(player=player)
             self.agent_selection = self.agents[next_player]
 
-        # set observations    
-        self.observations = dict(map(lambda agent: (agent, self.board.squares), self.agents))
         self.infos = dict(map(lambda agent: (agent, {}), self.agents))
 
     def _check_truncated(self):
@@ -104,13 +145,16 @@ class NoccaNocca(AlternatingGame):
                 self.rewards[agent] = 0
 
     def reset(self, seed: int | None = None, options: dict | None = None) -> None:
+        if seed is not None:
+            self.set_seed(seed)
+
         # reset board
         self.board = Board()
 
         # reset agent selection
         if self.initial_player is None:
             # select random player
-            self.agent_selection = self.agents[random.choice(self.players)]
+            self.agent_selection = self.agents[self.players[self.rng.integers(len(self.players))]]
         else:
             # select initial player
             self.agent_selection = self.agents[self.initial_player]
@@ -118,8 +162,6 @@ class NoccaNocca(AlternatingGame):
         # reset steps
         self.steps = 0
 
-        # reset observations    
-        self.observations = dict(map(lambda agent: (agent, self.board.squares), self.agents))
         self.rewards = dict(map(lambda agent: (agent, 0), self.agents))
         self.terminations = dict(map(lambda agent: (agent, False), self.agents))
         self.truncations = dict(map(lambda agent: (agent, False), self.agents))
@@ -136,7 +178,15 @@ class NoccaNocca(AlternatingGame):
             return None
     
     def clone(self):
-        return super().clone()
+        # only the board and the per game dicts are copied, the action tables are shared
+        game = copy.copy(self)
+        game.board = self.board.copy()
+        game.rewards = self.rewards.copy()
+        game.terminations = self.terminations.copy()
+        game.truncations = self.truncations.copy()
+        game.infos = dict(map(lambda agent: (agent, {}), self.agents))
+        game._action_mask = None
+        return game
     
     def eval(self, agent: AgentID) -> float:
         if agent not in self.agents:
@@ -145,5 +195,19 @@ class NoccaNocca(AlternatingGame):
         if self.terminated():
             return self.rewards[agent]
     
+        # advancement, stack control, blocked pieces and mobility of the agent minus the opponent
         player = self.agent_name_mapping[agent]
-        return 0. * player
+        return float(evaluate_boards(self.board.squares[None], self.board.heights[None], np.array([player]))[0])
+
+    def eval_children(self, agent: AgentID, actions: list[ActionType]) -> np.ndarray:
+        if agent not in self.agents:
+            raise ValueError(f"Agent {agent} is not part of the game.")
+
+        return evaluate_children(
+            self.board.squares,
+            self.board.heights,
+            actions,
+            mover=self.agent_name_mapping[self.agent_selection],
+            player=self.agent_name_mapping[agent],
+            truncated=self.max_steps is not None and self.steps + 1 >= self.max_steps
+        )
@@ -0,0 +1,57 @@
+import numpy as np
+from base.vector_game import VectorGame
+from games.nocca_nocca.nocca_nocca import NoccaNocca
+from games.nocca_nocca.board import Board, ROWS, COLS, MAX_STACK, EMPTY
+from games.nocca_nocca.board import legal_action_masks, play_actions, winners
+
+class VectorNoccaNocca(VectorGame):
+    """B games of NoccaNocca with the boards stacked in int8 arrays."""
+
+    def __init__(self, game: NoccaNocca, num_envs: int, seed=None) -> None:
+        super().__init__(game, num_envs, seed)
+        self.max_steps = game.max_steps
+        self.initial_player = game.initial_player
+
+        self.squares = np.full((num_envs, ROWS, COLS, MAX_STACK), EMPTY, dtype=np.int8)
+        self.heights = np.zeros((num_envs, ROWS, COLS), dtype=np.int8)
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        initial = Board()
+        self.initial_squares = initial.squares.astype(np.int8)
+        self.initial_heights = (self.initial_squares != EMPTY).sum(axis=-1).astype(np.int8)
+        self.reset()
+
+    def _reset(self, mask: np.ndarray) -> None:
+        self.squares[mask] = self.initial_squares
+        self.heights[mask] = self.initial_heights
+        self.steps[mask] = 0
+        if self.initial_player is None:
+            self.players[mask] = self.rng.integers(2, size=np.count_nonzero(mask))
+        else:
+            self.players[mask] = self.initial_player
+
+    def legal_action_mask(self) -> np.ndarray:
+        mask = legal_action_masks(self.squares, self.heights, self.players)
+        mask[self.done_mask()] = False
+        return mask
+
+    def step(self, actions: np.ndarray) -> None:
+        done = self.done_mask()
+        self._check_legal(~done, actions)
+        active = np.flatnonzero(~done)
+        players = self.players[active]
+        play_actions(self.squares, self.heights, active, actions[active], players)
+        self.steps[active] += 1
+
+        # check for game over or max steps
+        winner = winners(self.squares[active], self.heights[active])
+        game_over = winner != EMPTY
+        truncated = np.zeros_like(game_over) if self.max_steps is None else self.steps[active] >= self.max_steps
+        ended = game_over | truncated
+        won = active[game_over]
+        self.rewards[won] = -1
+        self.rewards[won, winner[game_over]] = 1
+        self.terminations[active[ended]] = True
+        self.truncations[active[truncated]] = True
+
+        # select next player
+        self.players[active[~ended]] = 1 - players[~ended]
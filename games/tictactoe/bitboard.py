@@ -0,0 +1,65 @@
+import numpy as np
+
+# squares are indexed as in the pettingzoo board, a board is a 9 bit integer
+# 0 3 6
+# 1 4 7
+# 2 5 8
+NUM_SQUARES = 9
+FULL_BOARD = (1 << NUM_SQUARES) - 1
+WIN_LINES = [
+    (0, 1, 2),
+    (3, 4, 5),
+    (6, 7, 8),
+    (0, 3, 6),
+    (1, 4, 7),
+    (2, 5, 8),
+    (0, 4, 8),
+    (2, 4, 6),
+]
+WIN_MASKS = [sum(1 << square for square in line) for line in WIN_LINES]
+
+# lookup tables indexed by a 9 bit board
+BOARD_SQUARES = np.array(
+    [[(bits >> square) & 1 for square in range(NUM_SQUARES)] for bits in range(FULL_BOARD + 1)],
+    dtype=np.int8
+)
+BOARD_WINS = [any(bits & mask == mask for mask in WIN_MASKS) for bits in range(FULL_BOARD + 1)]
+# BOARD_FREE[bits] marks the squares not in bits (the table reversed is indexed by FULL_BOARD ^ bits)
+BOARD_FREE = BOARD_SQUARES[::-1].astype(bool)
+BOARD_FREE.flags.writeable = False
+# a position key is the base 3 number where square i holds 0 (empty), 1 (X) or 2 (O)
+SQUARE_POWERS = [3 ** square for square in range(NUM_SQUARES)]
+
+
+def _symmetries() -> list[tuple[int, ...]]:
+    # the 8 rotations and reflections of the grid, SYMMETRIES[s][square] is where square is moved to
+    def rotate(r, c):
+        return c, 2 - r
+    def reflect(r, c):
+        return r, 2 - c
+    symmetries = []
+    for reflected in [False, True]:
+        for rotations in range(4):
+            perm = []
+            for square in range(NUM_SQUARES):
+                r, c = divmod(square, 3)
+                if reflected:
+                    r, c = reflect(r, c)
+                for _ in range(rotations):
+                    r, c = rotate(r, c)
+                perm.append(3 * r + c)
+            symmetries.append(tuple(perm))
+    return symmetries
+
+
+# SYMMETRIES[0] is the identity, INVERSE_SYMMETRIES[s] undoes SYMMETRIES[s]
+SYMMETRIES = _symmetries()
+INVERSE_SYMMETRIES = [tuple(perm.index(square) for square in range(NUM_SQUARES)) for perm in SYMMETRIES]
+# SYMMETRY_POWERS[square][s]: power of 3 of square in the key of the board transformed by symmetry s
+SYMMETRY_POWERS = [
+    tuple(SQUARE_POWERS[perm[square]] for perm in SYMMETRIES) for square in range(NUM_SQUARES)
+]
+BOARD_MOVES = [
+    tuple(square for square in range(NUM_SQUARES) if (bits >> square) & 1)
+    for bits in range(FULL_BOARD + 1)
+]
@@ -0,0 +1,58 @@
+import numpy as np
+from games.tictactoe.bitboard import NUM_SQUARES, WIN_LINES, BOARD_SQUARES
+
+# LINE_MASKS[l, s] is 1 if square s is part of line l
+LINE_MASKS = np.zeros((len(WIN_LINES), NUM_SQUARES), dtype=np.int8)
+for line, squares in enumerate(WIN_LINES):
+    LINE_MASKS[line, list(squares)] = 1
+
+# number of lines without any of the marks of a 9 bit board
+OPEN_LINES = ((BOARD_SQUARES @ LINE_MASKS.T) == 0).sum(axis=1)
+
+
+def evaluate_bits(own: int, opponent: int) -> float:
+    """Heuristic value of a 9 bit position: lines still open for the agent minus lines open for the opponent."""
+    return (OPEN_LINES[opponent] - OPEN_LINES[own]) / 8.0
+
+
+def evaluate_boards(own: np.ndarray, opponent: np.ndarray) -> np.ndarray:
+    """
+    Heuristic value of a batch of positions.
+
+    Parameters:
+        own: (B, 9) array with 1 where the agent has a mark
+        opponent: (B, 9) array with 1 where the opponent has a mark
+    """
+    own_open = ((own @ LINE_MASKS.T) == 0).sum(axis=-1)
+    opponent_open = ((opponent @ LINE_MASKS.T) == 0).sum(axis=-1)
+    return (opponent_open - own_open) / 8.0
+
+
+def evaluate_children(own: np.ndarray, opponent: np.ndarray, actions: list[int], own_turn: bool) -> np.ndarray:
+    """
+    Value of the positions reached by playing each action, from the point of view of the agent.
+
+    Terminal children get the reward of the agent (1 win, 0 draw, -1 loss), the rest get the
+    heuristic value of evaluate_boards.
+
+    Parameters:
+        own: (9,) array with 1 where the agent has a mark
+        opponent: (9,) array with 1 where the opponent has a mark
+        actions: squares played by the player to move
+        own_turn: whether the player to move is the agent
+    """
+    n = len(actions)
+    mover = np.repeat((own if own_turn else opponent)[None, :].astype(np.int8), n, axis=0)
+    mover[np.arange(n), actions] = 1
+    waiting = np.broadcast_to(opponent if own_turn else own, mover.shape)
+
+    if own_turn:
+        values = evaluate_boards(mover, waiting)
+    else:
+        values = evaluate_boards(waiting, mover)
+
+    full = (mover.sum(axis=1) + waiting.sum(axis=1)) == NUM_SQUARES
+    wins = ((mover @ LINE_MASKS.T) == 3).any(axis=1)
+    values[full] = 0.
+    values[wins] = 1. if own_turn else -1.
+    return values
@@ -0,0 +1,179 @@
+import os
+import tempfile
+import numpy as np
+from base.game import AlternatingGame, AgentID, ActionType
+from games.tictactoe.bitboard import NUM_SQUARES, FULL_BOARD, BOARD_WINS, SQUARE_POWERS, SYMMETRIES
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), 'solved_tictactoe.npz')
+
+# tables loaded by this process, by (path, canonical), the tables are never modified
+_TABLES: dict[tuple[str, bool], 'SolvedTicTacToe'] = {}
+
+
+def position_key(x_board: int, o_board: int) -> int:
+    # base 3 key of a position: square i holds 0 (empty), 1 (X) or 2 (O)
+    key = 0
+    for square in range(NUM_SQUARES):
+        if (x_board >> square) & 1:
+            key += 1 * SQUARE_POWERS[square]
+        elif (o_board >> square) & 1:
+            key += 2 * SQUARE_POWERS[square]
+    return key
+
+
+def canonical_keys(keys: np.ndarray) -> np.ndarray:
+    # smallest key of each position among its 8 symmetric positions
+    powers = np.array(SQUARE_POWERS)
+    digits = keys[:, None] // powers % 3
+    return np.min([digits @ powers[list(perm)] for perm in SYMMETRIES], axis=0)
+
+
+def game_key(game: AlternatingGame) -> int:
+    # both TicTacToe engines keep the position key up to date
+    return game.state_key()
+
+
+def solve() -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Solves TicTacToe by retrograde analysis.
+
+    Returns the keys of every reachable position (sorted), the value of each position for
+    the player to move (1 win, 0 draw, -1 loss) and a 9 bit mask with its optimal moves.
+    """
+    # reachable positions, layer n holds the positions with n marks
+    layers = [{(0, 0)}]
+    for n in range(NUM_SQUARES):
+        layer = set()
+        for boards in layers[-1]:
+            if BOARD_WINS[boards[0]] or BOARD_WINS[boards[1]]:
+                continue
+            player = n % 2
+            free = FULL_BOARD ^ (boards[0] | boards[1])
+            for square in range(NUM_SQUARES):
+                if (free >> square) & 1:
+                    child = list(boards)
+                    child[player] |= 1 << square
+                    layer.add(tuple(child))
+        layers.append(layer)
+
+    # backward pass from the full boards to the empty one
+    solution: dict[tuple[int, int], tuple[int, int]] = {}
+    for n in reversed(range(len(layers))):
+        player = n % 2
+        for boards in layers[n]:
+            free = FULL_BOARD ^ (boards[0] | boards[1])
+            if BOARD_WINS[boards[1 - player]]:
+                # the previous player won
+                solution[boards] = (-1, 0)
+                continue
+            if free == 0:
+                solution[boards] = (0, 0)
+                continue
+            best_value, best_moves = -2, 0
+            for square in range(NUM_SQUARES):
+                if (free >> square) & 1:
+                    child = list(boards)
+                    child[player] |= 1 << square
+                    value = -solution[tuple(child)][0]
+                    if value > best_value:
+                        best_value, best_moves = value, 1 << square
+                    elif value == best_value:
+                        best_moves |= 1 << square
+            solution[boards] = (best_value, best_moves)
+
+    keys = np.array([position_key(*boards) for boards in solution], dtype=np.int32)
+    values = np.array([value for value, _ in solution.values()], dtype=np.int8)
+    best_moves = np.array([moves for _, moves in solution.values()], dtype=np.uint16)
+    order = np.argsort(keys)
+    return keys[order], values[order], best_moves[order]
+
+
+def save_table(path: str, keys: np.ndarray, values: np.ndarray, best_moves: np.ndarray) -> None:
+    # written to a temporary file and moved into place, processes solving the game at the
+    # same time never read a partial table
+    handle, temporary = tempfile.mkstemp(suffix='.npz', dir=os.path.dirname(path) or '.')
+    try:
+        with os.fdopen(handle, 'wb') as file:
+            np.savez_compressed(file, keys=keys, values=values, best_moves=best_moves)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+class SolvedTicTacToe:
+    """
+    Perfect play table for TicTacToe (and NativeTicTacToe).
+
+    Use SolvedTicTacToe.load() to read the table from disk, it is generated and cached the
+    first time and every process loads it once. A canonical table only keeps one position of each set of symmetric positions
+    (765 out of 5478), positions are looked up by their canonical key and the optimal moves
+    are translated back to the actual board.
+    """
+
+    def __init__(self, keys: np.ndarray, values: np.ndarray, best_moves: np.ndarray, canonical: bool = False) -> None:
+        self.keys = keys
+        self.values = values
+        self.best_moves = best_moves
+        self.canonical = canonical
+        self.index = dict(zip(keys.tolist(), range(len(keys))))
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PATH, canonical: bool = False) -> 'SolvedTicTacToe':
+        # every process reads the table once, later calls share it
+        if (path, canonical) in _TABLES:
+            return _TABLES[(path, canonical)]
+        if os.path.exists(path):
+            with np.load(path) as table:
+                keys, values, best_moves = table['keys'], table['values'], table['best_moves']
+        else:
+            keys, values, best_moves = solve()
+            save_table(path, keys, values, best_moves)
+        if canonical:
+            keep = keys == canonical_keys(keys)
+            keys, values, best_moves = keys[keep], values[keep], best_moves[keep]
+        _TABLES[(path, canonical)] = cls(keys, values, best_moves, canonical=canonical)
+        return _TABLES[(path, canonical)]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _lookup(self, game: AlternatingGame) -> tuple[int, int]:
+        # index of the position in the table and symmetry that maps the game to it
+        key, symmetry = game.canonical_key() if self.canonical else (game_key(game), 0)
+        if key not in self.index:
+            raise ValueError(f"Position {key} is not a reachable TicTacToe position.")
+        return self.index[key], symmetry
+
+    def value(self, game: AlternatingGame, agent: AgentID = None) -> int:
+        """Value of the position under perfect play for agent (default: the agent to move)."""
+        value = int(self.values[self._lookup(game)[0]])
+        if agent is not None and agent != game.agent_selection:
+            value = -value
+        return value
+
+    def best_actions(self, game: AlternatingGame) -> list[ActionType]:
+        index, symmetry = self._lookup(game)
+        moves = int(self.best_moves[index])
+        return sorted(
+            game.original_action(square, symmetry) for square in range(NUM_SQUARES) if (moves >> square) & 1
+        )
+
+
+class MoveAccuracy:
+    """Counts how many of the moves of each agent are optimal according to a SolvedTicTacToe table."""
+
+    def __init__(self, table: SolvedTicTacToe) -> None:
+        self.table = table
+        self.counts: dict[str, list[int]] = {}
+
+    def record(self, game: AlternatingGame, name: str, action: ActionType) -> None:
+        counts = self.counts.setdefault(name, [0, 0])
+        counts[0] += int(action in self.table.best_actions(game))
+        counts[1] += 1
+
+    def accuracy(self) -> dict[str, float]:
+        return {name: correct / total for name, (correct, total) in self.counts.items()}
+
+    def reset(self) -> None:
+        self.counts = {}
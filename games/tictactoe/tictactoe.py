@@ -3,7 +3,9 @@ from numpy import ndarray
 from gymnasium.spaces import Discrete, Text, Dict, Tuple
 from pettingzoo.utils import agent_selector
 from games.tictactoe import tictactoe_v3 as tictactoe
-from base.game import AlternatingGame, AgentID
+from games.tictactoe.evaluation import evaluate_boards, evaluate_children
+from games.tictactoe.bitboard import SYMMETRIES, INVERSE_SYMMETRIES, SYMMETRY_POWERS
+from base.game import AlternatingGame, AgentID, ActionType
 import numpy as np
 
 import warnings
@@ -19,6 +21,8 @@ class TicTacToe(AlternatingGame):
         self.action_space = self.env.action_space
         self.agents = self.env.agents
         self.agent_name_mapping = dict(zip(self.agents, list(range(self.num_agents))))
+        # keys of the empty board under every symmetry, updated by step()
+        self._keys = [0] * len(SYMMETRIES)
 
     def _update(self):
         self.rewards = self.env.rewards
@@ -29,6 +33,7 @@ class TicTacToe(AlternatingGame):
 
     def reset(self):
         self.env.reset()
+        self._keys = [0] * len(SYMMETRIES)
         self._update()
 
     def observe(self, agent: AgentID) -> ObsType:
@@ -45,12 +50,34 @@ class TicTacToe(AlternatingGame):
         return grid
 
     def step(self, action):
+        empty = self.env.board.squares[action] == 0
         self.env.step(action)
+        if empty:
+            # the square now holds 1 (X) or 2 (O), update the key of the board under every symmetry
+            mark = int(self.env.board.squares[action])
+            self._keys = [key + mark * power for key, power in zip(self._keys, SYMMETRY_POWERS[action])]
         self._update()
 
+    def state_key(self) -> int:
+        # base 3 position key (see games.tictactoe.bitboard)
+        return self._keys[0]
+
+    def canonical_key(self) -> tuple[int, int]:
+        key = min(self._keys)
+        return key, self._keys.index(key)
+
+    def canonical_action(self, action: ActionType, symmetry: int) -> ActionType:
+        return SYMMETRIES[symmetry][action]
+
+    def original_action(self, action: ActionType, symmetry: int) -> ActionType:
+        return INVERSE_SYMMETRIES[symmetry][action]
+
     def available_actions(self):
         return self.env.board.legal_moves()
 
+    def action_mask(self) -> np.ndarray:
+        return np.equal(self.env.board.squares, 0, out=self._mask_buffer())
+
     def render(self):
         #print("Player:", self.agent_selection)
         print("Board:") 
@@ -78,28 +105,24 @@ class TicTacToe(AlternatingGame):
 
         if self.terminated():
             return self.rewards[agent]
-    
-        grid = self.observe(agent)
 
-        E_agent = self._eval(grid, 2)
-        E_opponent = self._eval(grid, 1)
-        v = (E_agent - E_opponent) / 8.0
+        # lines still open for the agent minus lines still open for the opponent
+        own, opponent = self._marks(agent)
+        return evaluate_boards(own, opponent)
 
-        return v
-    
-    def _eval(self, grid, player) -> float:
-        rows = 0
-        for i in range(3):
-            rows += int(all(grid[i] != player))
-
-        cols = 0
-        for i in range(3):
-            cols += int(all(grid.T[i] != player))           
+    def eval_children(self, agent: AgentID, actions: list[ActionType]) -> np.ndarray:
+        if agent not in self.agents:
+            raise ValueError(f"Agent {agent} is not part of the game.")
 
-        diag1 = int(all(grid.diagonal() != player))
-        diag2 = int(all(np.fliplr(grid).diagonal() != player))
+        own, opponent = self._marks(agent)
+        return evaluate_children(own, opponent, actions, own_turn=agent == self.agent_selection)
 
-        return (rows + cols + diag1 + diag2)
+    def features(self) -> np.ndarray:
+        # marks of the player to move followed by the marks of the opponent
+        own, opponent = self._marks(self.agent_selection)
+        return np.concatenate([own, opponent]).astype(np.float32)
 
-    
-    
+    def _marks(self, agent: AgentID) -> tuple[np.ndarray, np.ndarray]:
+        squares = np.array(self.env.board.squares, dtype=np.int8)
+        player = self.agent_name_mapping[agent] + 1
+        return (squares == player).astype(np.int8), (squares == 3 - player).astype(np.int8)
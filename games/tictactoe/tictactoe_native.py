@@ -0,0 +1,158 @@
+import copy
+import numpy as np
+from gymnasium import spaces
+from base.game import AlternatingGame, AgentID, ObsType, ActionType
+from games.tictactoe.bitboard import NUM_SQUARES, FULL_BOARD, BOARD_SQUARES, BOARD_FREE, BOARD_WINS, BOARD_MOVES
+from games.tictactoe.bitboard import SYMMETRIES, INVERSE_SYMMETRIES, SYMMETRY_POWERS
+from games.tictactoe.evaluation import evaluate_bits, evaluate_children
+
+class NativeTicTacToe(AlternatingGame):
+    """
+    Self-contained TicTacToe with the same interface as games.tictactoe.tictactoe.TicTacToe.
+
+    The marks of each player are stored as a 9 bit integer, so steps, legal moves and wins
+    are bit operations and table lookups, and clones only copy two integers.
+    """
+
+    def __init__(self, render_mode=''):
+        super().__init__()
+        self.render_mode = render_mode
+
+        self.agents = ["X", "O"]
+        self.possible_agents = self.agents[:]
+        self.agent_name_mapping = dict(zip(self.agents, list(range(self.num_agents))))
+
+        self.action_spaces = {agent: spaces.Discrete(NUM_SQUARES) for agent in self.agents}
+        self.observation_spaces = {
+            agent: spaces.Dict(
+                {
+                    "observation": spaces.Box(
+                        low=0, high=1, shape=(3, 3, 2), dtype=np.int8
+                    ),
+                    "action_mask": spaces.Box(low=0, high=1, shape=(9,), dtype=np.int8),
+                }
+            )
+            for agent in self.agents
+        }
+
+        self.rewards = {agent: 0 for agent in self.agents}
+        self.terminations = {agent: False for agent in self.agents}
+        self.truncations = {agent: False for agent in self.agents}
+        self.infos = {agent: {} for agent in self.agents}
+
+        self._boards = [0, 0]
+        self._player = 0
+        self._keys = [0] * len(SYMMETRIES)
+        self.agent_selection = self.agents[self._player]
+
+    def reset(self):
+        self._boards = [0, 0]
+        self._player = 0
+        self._keys = [0] * len(SYMMETRIES)
+        self.agent_selection = self.agents[self._player]
+
+        self.rewards = {agent: 0 for agent in self.agents}
+        self.terminations = {agent: False for agent in self.agents}
+        self.truncations = {agent: False for agent in self.agents}
+        self.infos = {agent: {} for agent in self.agents}
+
+    def observe(self, agent: AgentID) -> ObsType:
+        # blank space = 0, agent = 1, opponent = 2 (see TicTacToe.observe)
+        player = self.agent_name_mapping[agent]
+        grid = BOARD_SQUARES[self._boards[player]] + 2 * BOARD_SQUARES[self._boards[1 - player]]
+        return grid.reshape((3, 3))
+
+    def features(self) -> np.ndarray:
+        # marks of the player to move followed by the marks of the opponent (see TicTacToe.features)
+        own, opponent = BOARD_SQUARES[self._boards[self._player]], BOARD_SQUARES[self._boards[1 - self._player]]
+        return np.concatenate([own, opponent]).astype(np.float32)
+
+    def step(self, action: ActionType) -> None:
+        if self.terminations[self.agent_selection] or self.truncations[self.agent_selection]:
+            raise ValueError("Game has already finished - Call reset() if you want to play again")
+
+        move = 1 << action
+        if (self._boards[0] | self._boards[1]) & move:
+            raise ValueError(f"Invalid action {action} for agent {self.agent_selection} - Location is not empty.")
+
+        player = self._player
+        self._boards[player] |= move
+        # key of the board under every symmetry (a new list, clones share the old one)
+        self._keys = [key + (player + 1) * power for key, power in zip(self._keys, SYMMETRY_POWERS[action])]
+
+        if BOARD_WINS[self._boards[player]]:
+            self.rewards[self.agents[player]] += 1
+            self.rewards[self.agents[1 - player]] -= 1
+            self.terminations = {agent: True for agent in self.agents}
+        elif self._boards[0] | self._boards[1] == FULL_BOARD:
+            self.terminations = {agent: True for agent in self.agents}
+
+        self._player = 1 - player
+        self.agent_selection = self.agents[self._player]
+
+    def available_actions(self):
+        return list(BOARD_MOVES[FULL_BOARD ^ (self._boards[0] | self._boards[1])])
+
+    def state_key(self) -> int:
+        # base 3 position key, the same one as TicTacToe and the solved table
+        return self._keys[0]
+
+    def canonical_key(self) -> tuple[int, int]:
+        key = min(self._keys)
+        return key, self._keys.index(key)
+
+    def canonical_action(self, action: ActionType, symmetry: int) -> ActionType:
+        return SYMMETRIES[symmetry][action]
+
+    def original_action(self, action: ActionType, symmetry: int) -> ActionType:
+        return INVERSE_SYMMETRIES[symmetry][action]
+
+    def action_mask(self) -> np.ndarray:
+        # read-only row of a precomputed table
+        return BOARD_FREE[self._boards[0] | self._boards[1]]
+
+    def render(self):
+        print("Board:")
+        sq = (BOARD_SQUARES[self._boards[0]] + 2 * BOARD_SQUARES[self._boards[1]]).reshape((3, 3))
+        for i in range(3):
+            for j in range(3):
+                if sq[i, j] == 0:
+                    print(" . ", end="")
+                elif sq[i, j] == 1:
+                    print(" X ", end="")
+                else:
+                    print(" O ", end="")
+            print()
+        print()
+
+    def clone(self):
+        self_clone = copy.copy(self)
+        self_clone._boards = self._boards.copy()
+        self_clone.rewards = self.rewards.copy()
+        self_clone.terminations = self.terminations.copy()
+        self_clone.truncations = self.truncations.copy()
+        self_clone.infos = {agent: {} for agent in self.agents}
+        return self_clone
+
+    def eval(self, agent: AgentID) -> float:
+        if agent not in self.agents:
+            raise ValueError(f"Agent {agent} is not part of the game.")
+
+        if self.terminated():
+            return self.rewards[agent]
+
+        # lines still open for the agent minus lines still open for the opponent
+        player = self.agent_name_mapping[agent]
+        return evaluate_bits(self._boards[player], self._boards[1 - player])
+
+    def eval_children(self, agent: AgentID, actions: list[ActionType]) -> np.ndarray:
+        if agent not in self.agents:
+            raise ValueError(f"Agent {agent} is not part of the game.")
+
+        player = self.agent_name_mapping[agent]
+        return evaluate_children(
+            BOARD_SQUARES[self._boards[player]],
+            BOARD_SQUARES[self._boards[1 - player]],
+            actions,
+            own_turn=player == self._player
+        )
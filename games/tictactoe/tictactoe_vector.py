@@ -0,0 +1,44 @@
+import numpy as np
+from base.game import AlternatingGame
+from base.vector_game import VectorGame
+from games.tictactoe.bitboard import FULL_BOARD, BOARD_FREE, BOARD_WINS
+
+BOARD_WINS_ARRAY = np.array(BOARD_WINS)
+
+
+class VectorTicTacToe(VectorGame):
+    """B games of TicTacToe (or NativeTicTacToe), each one stored as two 9 bit boards."""
+
+    def __init__(self, game: AlternatingGame, num_envs: int, seed=None) -> None:
+        super().__init__(game, num_envs, seed)
+        self.boards = np.zeros((num_envs, 2), dtype=np.int16)
+        self.reset()
+
+    def _reset(self, mask: np.ndarray) -> None:
+        self.boards[mask] = 0
+        self.players[mask] = 0
+
+    def legal_action_mask(self) -> np.ndarray:
+        mask = BOARD_FREE[self.boards[:, 0] | self.boards[:, 1]]
+        mask[self.done_mask()] = False
+        return mask
+
+    def step(self, actions: np.ndarray) -> None:
+        active = np.flatnonzero(~self.done_mask())
+        players = self.players[active]
+        moves = np.left_shift(1, actions[active]).astype(np.int16)
+
+        occupied = self.boards[active, 0] | self.boards[active, 1]
+        if (occupied & moves).any():
+            env = active[np.argmax((occupied & moves) != 0)]
+            raise ValueError(f"Invalid action {actions[env]} in game {env} - Location is not empty.")
+
+        self.boards[active, players] |= moves
+        wins = BOARD_WINS_ARRAY[self.boards[active, players]]
+        full = (self.boards[active, 0] | self.boards[active, 1]) == FULL_BOARD
+
+        winners = active[wins]
+        self.rewards[winners, players[wins]] = 1
+        self.rewards[winners, 1 - players[wins]] = -1
+        self.terminations[active[wins | full]] = True
+        self.players[active] = 1 - players
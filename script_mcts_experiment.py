@@ -1,64 +1,96 @@
+import io
+import os
 import json
+import time
+import pstats
+import hashlib
+import cProfile
+import traceback
 import argparse
 import numpy as np
-from tqdm import tqdm
-import matplotlib.pyplot as plt
-
-from games.tictactoe.tictactoe import TicTacToe
-from games.nocca_nocca.nocca_nocca import NoccaNocca
+from typing import Iterator, TYPE_CHECKING
+from concurrent.futures import ProcessPoolExecutor
+
+from base.agent import Agent, merge_stats, seed_players
+from base.sequential import SPRT
+from base.utils import import_class, outcome_score
+
+# the games, agents, tqdm and matplotlib are imported when they are first used, every
+# worker process only pays for the game and agents of its experiment
+if TYPE_CHECKING:
+    from base.game import AlternatingGame
+    from games.tictactoe.solved import MoveAccuracy
+
+# games by name: class, extra kwargs taken from the experiment and whether the solved
+# TicTacToe table can measure the accuracy of the moves
+GAMES = {
+    'tictactoe': {'class_path': 'games.tictactoe.tictactoe.TicTacToe', 'max_steps': False, 'oracle': True},
+    'tictactoe_native': {'class_path': 'games.tictactoe.tictactoe_native.NativeTicTacToe', 'max_steps': False, 'oracle': True},
+    'nocca_nocca': {'class_path': 'games.nocca_nocca.nocca_nocca.NoccaNocca', 'max_steps': True, 'oracle': False},
+}
+GAME_ALIASES = {'tic-tac-toe': 'tictactoe', 'tic-tac-toe-native': 'tictactoe_native', 'nocca-nocca': 'nocca_nocca'}
+
+# agents by type: class and whether it takes the params and the verbose flag of the experiment
+AGENTS = {
+    'random': {'class_path': 'agents.agent_random.RandomAgent', 'params': False, 'verbose': False},
+    'mcts': {'class_path': 'agents.mcts.MonteCarloTreeSearch', 'params': True, 'verbose': True},
+    'minimax': {'class_path': 'agents.minimax.MiniMax', 'params': True, 'verbose': False},
+    'perfect': {'class_path': 'agents.perfect.PerfectAgent', 'params': False, 'verbose': False},
+}
+
+
+def game_entry(game_name: str) -> dict:
+    entry = GAMES.get(GAME_ALIASES.get(game_name, game_name))
+    if entry is None:
+        raise ValueError(f"Game {game_name} not supported")
+    return entry
 
-from base.agent import Agent
-from base.game import AlternatingGame
 
-from agents.minimax import MiniMax
-from agents.agent_random import RandomAgent
-from agents.mcts import MonteCarloTreeSearch as MCTS
+def agent_entry(agent_type: str) -> tuple[str, dict]:
+    # types like "mcts-100" name their registered agent
+    if agent_type in AGENTS:
+        return agent_type, AGENTS[agent_type]
+    for key in ['mcts', 'minimax']:
+        if key in agent_type:
+            return key, AGENTS[key]
+    raise ValueError(f"Agent type {agent_type} not supported")
 
 
 def create_agents(
     agents: list[dict],
-    game: AlternatingGame,
+    game: 'AlternatingGame',
     verbose: bool = False
 ) -> dict[str, Agent]:
-    if isinstance(game, TicTacToe):
-        agent_names = ["X", "O"]
-    elif isinstance(game, NoccaNocca):
-        agent_names = ["Black", "White"]
-    else:
-        raise ValueError(f"Game {game} not supported")
+    if len(game.agents) != len(agents):
+        raise ValueError(f"Game {game} needs {len(game.agents)} agents")
 
     created_agents = {}
-    for agent in agents:
-        agent_name = agent_names.pop(0)
-        if agent["type"] == "random":
-            created_agents[agent_name] = RandomAgent(
-                game=game,
-                agent=agent_name,
-                name=agent.get("name", f"{agent_name}_random")
-            )
-        elif "mcts" in agent["type"]:
-            created_agents[agent_name] = MCTS(
-                game=game,
-                agent=agent_name,
-                verbose=verbose,
-                name=agent.get("name", f"{agent_name}_mcts"),
-                **agent.get("params", {})
-            )
-        elif "minimax" in agent["type"]:
-            created_agents[agent_name] = MiniMax(
-                game=game,
-                agent=agent_name,
-                name=agent.get("name", f"{agent_name}_minimax"),
-                **agent.get("params", {})
-            )
+    for agent, agent_name in zip(agents, game.agents):
+        key, entry = agent_entry(agent["type"])
+        kwargs = dict(agent.get("params", {})) if entry['params'] else {}
+        if entry['verbose']:
+            kwargs['verbose'] = verbose
+        created_agents[agent_name] = import_class(entry['class_path'])(
+            game=game,
+            agent=agent_name,
+            name=agent.get("name", f"{agent_name}_{key}"),
+            **kwargs
+        )
     return created_agents
 
 
-def play_game(g: AlternatingGame, agents: dict[str, Agent], verbose: bool = False):
+def play_game(
+    g: 'AlternatingGame',
+    agents: dict[str, Agent],
+    verbose: bool = False,
+    oracle: 'MoveAccuracy' = None
+):
     g.reset()
     moves = 0
     while not g.done():
         action = agents[g.agent_selection].action()
+        if oracle is not None:
+            oracle.record(g, agents[g.agent_selection].name, action)
         if verbose:
             print(f"Agent {g.agent_selection} plays {action}")
         g.step(action)
@@ -71,50 +103,231 @@ def play_game(g: AlternatingGame, agents: dict[str, Agent], verbose: bool = Fals
     return rewards, moves
 
 
-def play_multiple_games(
-    g: AlternatingGame,
-    agents: dict[str, Agent],
-    agent_types: list[str] = None,
-    niter: int = 2000,
-    verbose: str = 'None',
-    use_tqdm: bool = True
+def summarize_games(
+    records: list[dict],
+    names: list[str]
 ) -> tuple[dict[str, float], dict[str, float], int, float]:
-    values = dict(map(lambda a: (agents[a].name, []), g.agents))
-    moves = []
-    rec = range(niter)
-    if use_tqdm:
-        rec = tqdm(range(niter), desc="Playing games")
-    for _ in rec:
-        _, game_moves = play_game(g, agents, verbose=verbose=='all')
-        for agent in g.agents:
-            values[agents[agent].name].append(g.reward(agent))
-            moves.append(game_moves)
-    
-    cum_rewards = {agent.name: sum(values[agent.name]) for agent in agents.values()}
-    wins = {agent.name: values[agent.name].count(1) for agent in agents.values()}
-    draws = values[agents[g.agents[0]].name].count(0)
-    avg_moves = sum(moves)/len(moves)
-
-    if verbose == 'all' or verbose == 'outer':
-        print(" ")
-        print(f"""Comparing agents: {', '.join([
-            agents[a].name for a in g.agents
-        ])} with {niter} iterations""")
-        print("Results:")
-        print('--------------------------------')
-        print(' - Cum rewards:', ", ".join([
-            f"{agents[a].name}: {cum_rewards[agents[a].name]}" for a in g.agents
-        ]))
-        print(' - Wins       :', ", ".join([
-            f"{agents[a].name}: {wins[agents[a].name]}" for a in g.agents
-        ]))
-        print(' - Draws      :', draws)
-        print(' - Avg moves  :', avg_moves)
-        print('--------------------------------')
-        print(" ")
+    # cum rewards, wins, draws and average moves of the game records of a batch
+    cum_rewards = {name: sum(record['rewards'][name] for record in records) for name in names}
+    wins = {name: sum(record['rewards'][name] == 1 for record in records) for name in names}
+    draws = sum(record['rewards'][names[0]] == 0 for record in records)
+    avg_moves = sum(record['moves'] for record in records) / len(records)
     return cum_rewards, wins, draws, avg_moves
 
 
+def record_score(record: dict, names: list[str]) -> float:
+    # score of the first agent in a game record, see base.utils.outcome_score
+    return outcome_score(record['rewards'][names[0]], record['rewards'][names[1]])
+
+
+def test_decision(test: SPRT, names: list[str]) -> str | None:
+    # name of the better agent, 'equal' or None while the test goes on
+    decision = test.decision()
+    return {'first': names[0], 'second': names[1]}.get(decision, decision)
+
+
+def format_stats(stats: dict) -> str:
+    # per call averages of the agent stats
+    calls = max(stats['calls'], 1)
+    parts = [f"{1000 * stats['time'] / calls:.2f} ms/move (max {1000 * stats['max_time']:.2f})"]
+    for key, value in stats.items():
+        if key in ['calls', 'time', 'max_time']:
+            continue
+        parts.append(f"{key} {value}" if key.startswith('max_') else f"{key}/move {value / calls:.1f}")
+    return ", ".join(parts)
+
+
+def print_summary(
+    names: list[str],
+    niter: int,
+    cum_rewards: dict[str, float],
+    wins: dict[str, float],
+    draws: int,
+    avg_moves: float,
+    accuracy: dict[str, float] = None,
+    stats: dict[str, dict] = None
+) -> None:
+    print(" ")
+    print(f"Comparing agents: {', '.join(names)} with {niter} iterations")
+    print("Results:")
+    print('--------------------------------')
+    print(' - Cum rewards:', ", ".join([f"{name}: {cum_rewards[name]}" for name in names]))
+    print(' - Wins       :', ", ".join([f"{name}: {wins[name]}" for name in names]))
+    print(' - Draws      :', draws)
+    print(' - Avg moves  :', avg_moves)
+    if accuracy is not None:
+        print(' - Accuracy   :', ", ".join([
+            f"{name}: {value:.3f}" for name, value in accuracy.items()
+        ]))
+    if stats is not None:
+        for name in names:
+            print(f' - Stats {name}:', format_stats(stats[name]))
+    print('--------------------------------')
+    print(" ")
+
+
+def create_game(game_name: str, game_max_steps: int = 100) -> 'AlternatingGame':
+    entry = game_entry(game_name)
+    kwargs = {'max_steps': game_max_steps} if entry['max_steps'] else {}
+    return import_class(entry['class_path'])(**kwargs)
+
+
+def game_seeds(seed: int | None, n_games: int) -> list[int]:
+    # seed of every game, game i always gets the same seed for a given experiment seed
+    return np.random.SeedSequence(seed).generate_state(n_games).tolist()
+
+
+def seed_game(seed: int, game: 'AlternatingGame', agents: dict[str, Agent]) -> None:
+    # the game and the agents draw from their own generators, derived from the seed of the game
+    seed_players(game, list(agents.values()), seed)
+
+
+class GamePlayer:
+    """
+    Plays single seeded games of an experiment and returns their records. Every worker
+    process of the pool builds its own GamePlayer.
+    """
+
+    def __init__(
+        self,
+        agents_to_compare: list[dict],
+        game_name: str,
+        game_max_steps: int = 100,
+        use_oracle: bool = False,
+        verbose: str = 'None',
+        collect_stats: bool = False
+    ) -> None:
+        self.game = create_game(game_name, game_max_steps)
+        self.agents = create_agents(agents_to_compare, self.game)
+        self.verbose = verbose
+        self.collect_stats = collect_stats
+        for agent in self.agents.values():
+            agent.enable_stats(collect_stats)
+        # perfect play table to measure the accuracy of the moves (only TicTacToe)
+        self.oracle = None
+        if use_oracle:
+            if not game_entry(game_name)['oracle']:
+                raise ValueError(f"Oracle not available for game {game_name}")
+            from games.tictactoe.solved import SolvedTicTacToe, MoveAccuracy
+            self.oracle = MoveAccuracy(SolvedTicTacToe.load())
+
+    def names(self) -> list[str]:
+        return [self.agents[a].name for a in self.game.agents]
+
+    def play(self, game_index: int, seed: int) -> dict:
+        seed_game(seed, self.game, self.agents)
+        _, moves = play_game(self.game, self.agents, verbose=self.verbose == 'all', oracle=self.oracle)
+        record = {
+            'game': game_index,
+            'seed': seed,
+            'rewards': {self.agents[agent].name: self.game.reward(agent) for agent in self.game.agents},
+            'moves': moves
+        }
+        if self.oracle is not None:
+            record['accuracy'] = self.oracle.counts
+            self.oracle.reset()
+        if self.collect_stats:
+            record['stats'] = {agent.name: agent.stats() for agent in self.agents.values()}
+            for agent in self.agents.values():
+                agent.reset_stats()
+        return record
+
+
+# player of the worker processes, set by _init_worker
+_worker_player: GamePlayer = None
+
+
+def _init_worker(player_kwargs: dict) -> None:
+    global _worker_player
+    _worker_player = GamePlayer(**player_kwargs)
+
+
+def _play_in_worker(task: tuple[int, int]) -> dict:
+    return _worker_player.play(*task)
+
+
+def play_records(
+    player_kwargs: dict,
+    tasks: list[tuple[int, int]],
+    workers: int = 1
+) -> Iterator[dict]:
+    """Yields the record of every (game index, seed) task, in order, playing them in a pool of workers processes."""
+    if workers <= 1:
+        player = GamePlayer(**player_kwargs)
+        for task in tasks:
+            yield player.play(*task)
+        return
+    chunksize = max(1, len(tasks) // (workers * 8))
+    executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(player_kwargs,))
+    try:
+        yield from executor.map(_play_in_worker, tasks, chunksize=chunksize)
+    finally:
+        # the games not started yet are cancelled if the caller stops early
+        executor.shutdown(cancel_futures=True)
+
+
+def settings_hash(settings: dict) -> str:
+    return hashlib.sha1(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def experiment_id(experiment: dict) -> str:
+    # experiments are identified by their name or by the settings that change their games
+    if 'name' in experiment:
+        return experiment['name']
+    return settings_hash({
+        key: experiment.get(key) for key in ['agents_to_compare', 'game_name', 'game_max_steps', 'use_oracle', 'seed']
+    })
+
+
+def read_log(log_path: str, experiment: str, settings: str, fields: list[str] = ()) -> dict[int, dict]:
+    # records of the games of an experiment already in the log, by game index. Records of
+    # other settings (the experiment was changed under the same id) or without some of the
+    # fields are left out so their games are played again, and so are lines cut off by a crash
+    records = {}
+    if log_path is None or not os.path.exists(log_path):
+        return records
+    with open(log_path, 'r') as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if (
+                record.get('experiment') == experiment and record.get('settings') == settings
+                and all(field in record for field in fields)
+            ):
+                records[record['game']] = record
+    return records
+
+
+def open_log(log_path: str):
+    # the last line is ended if a crash cut it off, so the next record starts on its own line
+    cut_off = False
+    if os.path.exists(log_path) and os.path.getsize(log_path) > 0:
+        with open(log_path, 'rb') as file:
+            file.seek(-1, os.SEEK_END)
+            cut_off = file.read(1) != b'\n'
+    file = open(log_path, 'a')
+    if cut_off:
+        file.write('\n')
+    return file
+
+
+def append_log(file, record: dict) -> None:
+    file.write(json.dumps(record, default=lambda value: value.item()) + '\n')
+    file.flush()
+
+
+def batch_accuracy(records: list[dict]) -> dict[str, float]:
+    counts: dict[str, list[int]] = {}
+    for record in records:
+        for name, (correct, total) in record['accuracy'].items():
+            name_counts = counts.setdefault(name, [0, 0])
+            name_counts[0] += correct
+            name_counts[1] += total
+    return {name: correct / total for name, (correct, total) in counts.items()}
+
+
 def compare_agents(
     agents_to_compare: list[str],
     n_iters: int = 2000,
@@ -123,59 +336,147 @@ def compare_agents(
     game_name: str = 'tic-tac-toe',
     game_max_steps: int = 100,
     use_tqdm: bool = True,
-    use_tqdm_on_games: bool = False
+    use_tqdm_on_games: bool = False,
+    use_oracle: bool = False,
+    workers: int = 1,
+    seed: int = None,
+    log_path: str = None,
+    experiment: str = None,
+    early_stopping: float = None,
+    min_difference: float = 0.1,
+    collect_stats: bool = False
 ) -> dict[str, float]:
+    """
+    Plays n_iters games between two agents and aggregates the results in batches of step games.
+
+    Every game gets its own seed derived from seed, so the results only depend on seed and
+    not on the number of workers processes the games are distributed to.
+
+    With a log_path, the record of every game is appended to that JSON Lines file under the
+    experiment id as soon as it finishes, and the games of the experiment already in the log
+    are not played again, so an interrupted experiment resumes where it stopped. Logged games
+    are only reused if they were played with the same agents, game and seed and have the
+    accuracy and stats asked for, the rest are played again.
+
+    With early_stopping (a significance level), a sequential test (SPRT) stops the games as
+    soon as one agent is significantly better or both are within min_difference of expected
+    score (draws count half) of each other. early_stopping is also the probability of
+    missing a difference of min_difference (the beta of SPRT). The results then also hold
+    the number of games played and saved and the decision of the test (the better agent or
+    'equal').
+
+    With collect_stats, results['stats'] holds the search stats of every agent (see
+    Agent.stats()) added up over each batch.
+    """
 
     assert len(agents_to_compare) == 2, "Only 2 agents can be compared"
     if step is None:
         step = n_iters
 
-    if game_name == 'tic-tac-toe' or game_name == 'tictactoe':
-        game = TicTacToe()
-    elif game_name == 'nocca-nocca' or game_name == 'nocca_nocca':
-        game = NoccaNocca(max_steps=game_max_steps)
-    else:
-        raise ValueError(f"Game {game_name} not supported")
+    player_kwargs = {
+        'agents_to_compare': agents_to_compare,
+        'game_name': game_name,
+        'game_max_steps': game_max_steps,
+        'use_oracle': use_oracle,
+        'verbose': verbose,
+        'collect_stats': collect_stats,
+    }
+    # fails early on unsupported games and agents, and gives the agent names
+    names = GamePlayer(**player_kwargs).names()
 
-    agents = create_agents(agents_to_compare, game)
-    
     results = {
-        'cum_rewards': { 
-            agent.name :
-                [] for agent in agents.values()
-        },
-        'wins': {
-            agent.name :
-                [] for agent in agents.values()
-        },
+        'cum_rewards': {name: [] for name in names},
+        'wins': {name: [] for name in names},
         'draws': [],
         'avg_moves': []
     }
-
+    if use_oracle:
+        results['accuracy'] = {name: [] for name in names}
+    if collect_stats:
+        results['stats'] = {name: [] for name in names}
+
+    if log_path is not None and experiment is None:
+        raise ValueError("An experiment id is needed to log the games.")
+    # settings the games depend on, records logged with other settings are not reused
+    settings = settings_hash({
+        'agents_to_compare': agents_to_compare, 'game_name': game_name, 'game_max_steps': game_max_steps, 'seed': seed
+    })
+    fields = [field for field, needed in [('accuracy', use_oracle), ('stats', collect_stats)] if needed]
+    logged = read_log(log_path, experiment, settings, fields)
+    seeds = game_seeds(seed, n_iters)
+    tasks = [(game, game_seed) for game, game_seed in enumerate(seeds) if game not in logged]
+    records = play_records(player_kwargs, tasks, workers=workers)
+    log_file = open_log(log_path) if log_path is not None and tasks else None
+
+    def next_record(game: int) -> dict:
+        if game in logged:
+            return logged[game]
+        record = next(records)
+        if log_file is not None:
+            append_log(log_file, {'experiment': experiment, 'settings': settings, **record})
+        return record
+
+    if use_tqdm or use_tqdm_on_games:
+        from tqdm import tqdm
     if use_tqdm:
         rec = tqdm(range(0, n_iters, step), desc="Playing games")
     else:
         rec = range(0, n_iters, step)
 
-    for _ in rec:
-        g_cum_rewards, g_wins, g_draws, g_avg_moves = play_multiple_games(
-            game,
-            agents,
-            niter=step,
-            agent_types=agents_to_compare,
-            verbose=verbose,
-            use_tqdm=use_tqdm_on_games
-        )
-        for agent in agents.values():
-            results['cum_rewards'][agent.name].append(g_cum_rewards[agent.name])
-            results['wins'][agent.name].append(g_wins[agent.name])
+    test = SPRT(alpha=early_stopping, beta=early_stopping, delta=min_difference) if early_stopping is not None else None
+    played = 0
+    for start in rec:
+        games = range(start, min(start + step, n_iters))
+        if use_tqdm_on_games:
+            games = tqdm(games, desc="Playing games")
+        batch = []
+        for game in games:
+            batch.append(next_record(game))
+            if test is not None:
+                test.update(record_score(batch[-1], names))
+                if test.decision() is not None:
+                    break
+        played += len(batch)
+        g_cum_rewards, g_wins, g_draws, g_avg_moves = summarize_games(batch, names)
+        for name in names:
+            results['cum_rewards'][name].append(g_cum_rewards[name])
+            results['wins'][name].append(g_wins[name])
         results['draws'].append(g_draws)
         results['avg_moves'].append(g_avg_moves)
-
+        accuracy = None
+        if use_oracle:
+            accuracy = batch_accuracy(batch)
+            for name in names:
+                results['accuracy'][name].append(accuracy.get(name))
+        stats = None
+        if collect_stats:
+            stats = {name: merge_stats([record['stats'][name] for record in batch]) for name in names}
+            for name in names:
+                results['stats'][name].append(stats[name])
+        if verbose == 'all' or verbose == 'outer':
+            print_summary(names, len(batch), g_cum_rewards, g_wins, g_draws, g_avg_moves, accuracy, stats)
+        if test is not None and test.decision() is not None:
+            break
+
+    # stops the pending games of the pool
+    records.close()
+    if log_file is not None:
+        log_file.close()
+    if test is not None:
+        results['games_played'] = played
+        results['games_saved'] = n_iters - played
+        results['decision'] = test_decision(test, names)
+        if played < n_iters:
+            print(f"Stopped early ({results['decision']}) after {played} games, {n_iters - played} games saved")
     return results
 
 
 def plot_results(results, save_path=None, show=True):
+    # matplotlib is only imported when the plot is saved or shown
+    if not save_path and not show:
+        return
+    import matplotlib.pyplot as plt
+
     # Create subplots
     fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
     fig.suptitle('Game Results Analysis', fontsize=16, fontweight='bold')
@@ -191,6 +492,8 @@ def plot_results(results, save_path=None, show=True):
     if show:
         plt.tight_layout()
         plt.show()
+    else:
+        plt.close(fig)
 
 
 # Plot 1: Cumulative Rewards over time
@@ -288,7 +591,15 @@ def complete_comparison(
     use_tqdm: bool = True,
     use_tqdm_on_games: bool = False,
     save_path: str = None,
-    show_plot: bool = False
+    show_plot: bool = False,
+    use_oracle: bool = False,
+    workers: int = 1,
+    seed: int = None,
+    log_path: str = None,
+    experiment: str = None,
+    early_stopping: float = None,
+    min_difference: float = 0.1,
+    collect_stats: bool = False
 ) -> dict:
     results = compare_agents(
         agents_to_compare=agents_to_compare,
@@ -298,6 +609,14 @@ def complete_comparison(
         game_max_steps=game_max_steps,
         use_tqdm=use_tqdm,
         use_tqdm_on_games=use_tqdm_on_games,
+        use_oracle=use_oracle,
+        workers=workers,
+        seed=seed,
+        log_path=log_path,
+        experiment=experiment,
+        early_stopping=early_stopping,
+        min_difference=min_difference,
+        collect_stats=collect_stats,
     )
     plot_results(
         results,
@@ -307,35 +626,196 @@ def complete_comparison(
     return results
 
 
+REPO_DIR = os.path.dirname(os.path.abspath(__file__)).replace(os.sep, '/')
+
+
+def profile_category(function: tuple[str, int, str]) -> str | None:
+    """
+    Category of a profiled function, given as a pstats key (filename, line, name). None for
+    the standard library, numpy and the built-ins, whose time belongs to their callers.
+    """
+    filename, _, name = function
+    path = filename.replace(os.sep, '/')
+    if '/matplotlib/' in path or name.startswith('plot_'):
+        return 'plotting'
+    if '/pettingzoo/' in path or '/gymnasium/' in path:
+        return 'game engine'
+    if not path.startswith(REPO_DIR + '/'):
+        return None
+    if path.startswith(REPO_DIR + '/agents/'):
+        return 'agent search'
+    if path.startswith((REPO_DIR + '/games/', REPO_DIR + '/base/game')):
+        return 'game engine'
+    return 'other'
+
+
+PROFILE_CATEGORIES = ['game engine', 'agent search', 'plotting', 'other']
+
+
+def profile_breakdown(stats: pstats.Stats) -> dict[str, float]:
+    """
+    Own time of the profiled functions added up by category. The own time of library and
+    built-in functions (copy, numpy, list methods, ...) is split among their callers in
+    proportion to the time spent under each call site, transitively, so a deepcopy made by
+    a game clone counts as game engine time.
+    """
+    functions = list(stats.stats.keys())
+    index = {function: i for i, function in enumerate(functions)}
+    n = len(functions)
+    # shares[i, c] is the fraction of the own time of function i that belongs to category c
+    known = np.zeros((n, len(PROFILE_CATEGORIES)))
+    calls = np.zeros((n, n))
+    for function, (_, _, _, _, callers) in stats.stats.items():
+        i = index[function]
+        category = profile_category(function)
+        if category is not None:
+            known[i, PROFILE_CATEGORIES.index(category)] = 1.
+            continue
+        for caller, edge in callers.items():
+            calls[i, index[caller]] += edge[3]
+        if calls[i].sum() > 0:
+            calls[i] /= calls[i].sum()
+        else:
+            known[i, PROFILE_CATEGORIES.index('other')] = 1.
+    # shares = known + calls @ shares, the recursive calls of the library functions make it
+    # a linear system instead of a walk up the callers
+    shares = np.linalg.lstsq(np.eye(n) - calls, known, rcond=None)[0]
+    own_times = np.array([stats.stats[function][2] for function in functions])
+    return dict(zip(PROFILE_CATEGORIES, (own_times @ shares).tolist()))
+
+
+def profile_report(
+    stats: pstats.Stats,
+    experiment: str,
+    games_time: float,
+    plot_time: float,
+    results: dict,
+    top: int = 25
+) -> str:
+    total = games_time + plot_time
+    lines = [
+        f"Profile of experiment {experiment}",
+        f"Total time: {total:.2f} s (games {games_time:.2f} s, plotting {plot_time:.2f} s)",
+    ]
+    # every call to action() of the agents is a move
+    agent_stats = {name: merge_stats(batches) for name, batches in results.get('stats', {}).items()}
+    moves = sum(entry['calls'] for entry in agent_stats.values())
+    if moves:
+        lines.append(f"Moves: {moves}, {1000 * games_time / moves:.3f} ms per move")
+        for name, entry in agent_stats.items():
+            if entry['calls']:
+                lines.append(
+                    f"  {name}: {entry['calls']} moves, {1000 * entry['time'] / entry['calls']:.3f} ms per move in action()"
+                )
+
+    breakdown = profile_breakdown(stats)
+    profiled = sum(breakdown.values())
+    lines += ["", "Time by category (own time, library functions count for their callers):"]
+    for category, seconds in breakdown.items():
+        share = seconds / profiled if profiled else 0.
+        lines.append(f"  {category:>12}: {seconds:8.2f} s {share:6.1%}")
+
+    for sort, title in [('cumulative', 'cumulative time'), ('tottime', 'own time'), ('ncalls', 'call count')]:
+        stream = io.StringIO()
+        stats.stream = stream
+        stats.sort_stats(sort).print_stats(top)
+        lines += ["", f"Top {top} functions by {title}:", stream.getvalue().strip()]
+    return "\n".join(lines) + "\n"
+
+
+def profile_comparison(report_path: str, **comparison_kwargs) -> dict:
+    """
+    Runs complete_comparison() under cProfile and writes a text report to report_path (time
+    by category, time per move and the top functions) and the raw profile next to it, with
+    a .prof extension, to be opened with pstats or snakeviz.
+
+    The games are played in this process (workers are ignored, the profile would not see
+    the games played by other processes) and the game log is not used, so every game is
+    played and timed. The search stats of the agents are collected for the time per move.
+    """
+    comparison_kwargs.update(workers=1, log_path=None, collect_stats=True)
+    plot_kwargs = {
+        'save_path': comparison_kwargs.pop('save_path', None),
+        'show': comparison_kwargs.pop('show_plot', False),
+    }
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    results = compare_agents(**comparison_kwargs)
+    games_time = time.perf_counter() - start
+    plot_results(results, **plot_kwargs)
+    profiler.disable()
+    plot_time = time.perf_counter() - start - games_time
+
+    stats = pstats.Stats(profiler)
+    report = profile_report(stats, comparison_kwargs.get('experiment'), games_time, plot_time, results)
+    with open(report_path, 'w') as file:
+        file.write(report)
+    stats.dump_stats(os.path.splitext(report_path)[0] + '.prof')
+    print(f"Profile saved to {report_path}")
+    return results
+
+
+def profile_path(experiment: dict) -> str:
+    # next to the result PNG, or in the working directory when the results are not saved
+    save_path = experiment.get('save_path', None)
+    if save_path is not None:
+        return os.path.splitext(save_path)[0] + '_profile.txt'
+    return f"profile_{experiment_id(experiment)}.txt"
+
+
 def read_experiments_from_config(config_path: str) -> list[dict]:
     with open(config_path, 'r') as file:
         config = json.load(file)
     return config
 
 
-def run_experiments(config: dict):
+def run_experiments(config: dict, workers: int = 1, log_path: str = None, profile: bool = False):
+    failed = []
     for experiment in config:
         try:
-            complete_comparison(
+            comparison_kwargs = dict(
                 agents_to_compare=experiment['agents_to_compare'],
                 game_name=experiment['game_name'],
                 n_iters=experiment['n_iters'],
                 step=experiment['step'],
                 game_max_steps=experiment.get('game_max_steps', 100),
                 use_tqdm_on_games=experiment.get('use_tqdm_on_games', False),
-                save_path=experiment.get('save_path', None)
+                save_path=experiment.get('save_path', None),
+                use_oracle=experiment.get('use_oracle', False),
+                workers=workers,
+                seed=experiment.get('seed', None),
+                log_path=log_path,
+                experiment=experiment_id(experiment),
+                early_stopping=experiment.get('early_stopping', None),
+                min_difference=experiment.get('min_difference', 0.1),
+                collect_stats=experiment.get('collect_stats', False)
             )
-        except Exception as e:
-            print(f"Error running experiment: {e}")
-            continue
+            if profile:
+                profile_comparison(profile_path(experiment), **comparison_kwargs)
+            else:
+                complete_comparison(**comparison_kwargs)
+        except Exception:
+            # keep running the other experiments, the failed ones are reported at the end
+            print(f"Error running experiment {experiment_id(experiment)}:")
+            traceback.print_exc()
+            failed.append(experiment_id(experiment))
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {len(config)} experiments failed: {', '.join(failed)}")
 
 
 if __name__ == "__main__":
     # Take the config file from the command line with the argument --config
     parser = argparse.ArgumentParser()
     parser.add_argument("--config", type=str, required=True)
+    parser.add_argument("--workers", type=int, default=1, help="number of processes playing the games")
+    parser.add_argument("--log", type=str, default=None, help="JSON Lines file with the played games, used to resume")
+    parser.add_argument(
+        "--profile", action='store_true',
+        help="profile every experiment in a single process and write a report next to its plot"
+    )
     args = parser.parse_args()
     print(f"Running experiments from config: {args.config}")
     config = read_experiments_from_config(args.config)
-    run_experiments(config)
+    run_experiments(config, workers=args.workers, log_path=args.log, profile=args.profile)
     print("Experiments completed!")
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""
+Self Play Training Script
+
+Trains a PolicyValueNetwork (agents/network.py) for MCTS by self play. Every iteration plays
+games between two MCTS agents sharing the network as evaluator, stores for every position
+its features, its legal actions, the visit distribution of the search and the final reward
+of the agent to move in a replay buffer, and trains the network on batches sampled from
+the buffer: the policy head toward the visit distributions, the value head toward the
+rewards. After training, MCTS with the network plays against random and against MCTS with
+rollouts at the same number of simulations, and the network is saved. Run it with:
+
+    python selfplay.py --game tictactoe_native --iterations 10 --output tictactoe_network.npz
+    python selfplay.py --game nocca_nocca --iterations 20 --simulations 100 --output nocca_network.npz
+
+The saved network is loaded with PolicyValueNetwork.load and given to MCTS as evaluator.
+"""
+
+import time
+import argparse
+import numpy as np
+from collections import deque
+from functools import partial
+
+from base.game import AlternatingGame
+from base.agent import seed_players
+from base.utils import play_match
+from agents.mcts import MonteCarloTreeSearch
+from agents.network import PolicyValueNetwork
+from agents.agent_random import RandomAgent
+from script_mcts_experiment import create_game
+
+
+def self_play_game(
+    game: AlternatingGame,
+    network: PolicyValueNetwork,
+    simulations: int,
+    batch_size: int,
+    temperature_moves: int,
+    seed: int
+) -> list[tuple[np.ndarray, np.ndarray, np.ndarray, float]]:
+    """
+    Plays a game of the network against itself.
+
+    The first temperature_moves moves are sampled from the visit distribution of the search
+    (so the games differ), the rest play the most visited action.
+
+    Returns:
+        List of (features, legal actions mask, visit distribution, final reward of the agent
+        to move) of every position of the game
+    """
+    players = {
+        agent: MonteCarloTreeSearch(game, agent, simulations=simulations, evaluator=network, batch_size=batch_size)
+        for agent in game.agents
+    }
+    seed_players(game, list(players.values()), seed)
+    rng = np.random.default_rng(seed)
+    game.reset()
+    positions = []
+    while not game.game_over():
+        mover = game.agent_selection
+        policy = players[mover].policy()
+        positions.append((game.features(), game.action_mask().astype(bool), policy, mover))
+        if len(positions) <= temperature_moves:
+            action = rng.choice(len(policy), p=policy)
+        else:
+            action = int(np.argmax(policy))
+        game.step(action)
+    return [(features, mask, policy, game.reward(mover)) for features, mask, policy, mover in positions]
+
+
+def train(
+    network: PolicyValueNetwork,
+    buffer: deque,
+    steps: int,
+    batch_size: int,
+    rng: np.random.Generator
+) -> dict[str, float]:
+    """Trains network on steps batches sampled from buffer, returns the mean losses."""
+    losses = []
+    for _ in range(steps):
+        batch = [buffer[i] for i in rng.integers(len(buffer), size=min(batch_size, len(buffer)))]
+        features, masks, policies, values = (np.stack(column) for column in zip(*batch))
+        losses.append(network.train_batch(features, masks, policies, values.astype(np.float32)))
+    return {key: float(np.mean([loss[key] for loss in losses])) for key in losses[0]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--game", type=str, default="tictactoe_native", choices=['tictactoe', 'tictactoe_native', 'nocca_nocca'])
+    parser.add_argument("--game-max-steps", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--games", type=int, default=50, help="self play games per iteration")
+    parser.add_argument("--simulations", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=8, help="leaves evaluated together by the network")
+    parser.add_argument("--temperature-moves", type=int, default=4, help="moves sampled from the visits at the start of each game")
+    parser.add_argument("--hidden", type=int, nargs='+', default=[64, 64])
+    parser.add_argument("--learning-rate", type=float, default=1e-3)
+    parser.add_argument("--train-steps", type=int, default=200, help="training batches per iteration")
+    parser.add_argument("--train-batch-size", type=int, default=128)
+    parser.add_argument("--buffer-size", type=int, default=20000, help="positions kept in the replay buffer")
+    parser.add_argument("--eval-games", type=int, default=20)
+    parser.add_argument("--output", type=str, default=None, help="file to save the network to (.npz)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    game = create_game(args.game, args.game_max_steps)
+    game.reset()
+    network = PolicyValueNetwork(
+        len(game.features()), len(game.action_mask()), hidden=tuple(args.hidden),
+        learning_rate=args.learning_rate, seed=args.seed
+    )
+    rng = np.random.default_rng(args.seed)
+    seeds = np.random.SeedSequence(args.seed).generate_state(args.iterations * args.games).tolist()
+    buffer = deque(maxlen=args.buffer_size)
+
+    for iteration in range(args.iterations):
+        start = time.perf_counter()
+        for g in range(args.games):
+            buffer.extend(self_play_game(
+                game, network, args.simulations, args.batch_size, args.temperature_moves,
+                seeds[iteration * args.games + g]
+            ))
+        play_time = time.perf_counter() - start
+        losses = train(network, buffer, args.train_steps, args.train_batch_size, rng)
+
+        mcts = partial(MonteCarloTreeSearch, game, simulations=args.simulations, evaluator=network, batch_size=args.batch_size)
+        random = partial(RandomAgent, game)
+        rollouts = partial(MonteCarloTreeSearch, game, simulations=args.simulations)
+        print(
+            f"iteration {iteration + 1}: {len(buffer)} positions, self play {play_time:.1f}s, "
+            f"policy loss {losses['policy_loss']:.3f}, value loss {losses['value_loss']:.3f}, "
+            f"vs random {np.mean(play_match(game, mcts, random, args.eval_games, iteration)):.2f}, "
+            f"vs rollouts {np.mean(play_match(game, mcts, rollouts, args.eval_games, iteration)):.2f}"
+        )
+        if args.output is not None:
+            network.save(args.output)
@@ -5,7 +5,6 @@ This script tests different agent combinations playing various games and generat
 results and visualizations based on win percentages.
 """
 
-import importlib
 import itertools
 import csv
 import matplotlib.pyplot as plt
@@ -13,6 +12,7 @@ import numpy as np
 from tqdm import tqdm
 
 import config
+from base.utils import import_class
 
 
 class AgentTester:
@@ -30,23 +30,17 @@ class AgentTester:
         self.num_games = num_games
         self.results = []
         
-    def import_class(self, class_path: str):
-        """Import a class from a string path."""
-        module_path, class_name = class_path.rsplit('.', 1)
-        module = importlib.import_module(module_path)
-        return getattr(module, class_name)
-    
     def create_agent(self, agent_name: str, game_instance, agent_id):
         """Create an agent instance."""
         agent_config = config.AGENTS[agent_name]
-        agent_class = self.import_class(agent_config['class_path'])
+        agent_class = import_class(agent_config['class_path'])
         kwargs = agent_config['kwargs'].copy()
         return agent_class(game_instance, agent_id, **kwargs)
     
     def create_game(self, game_name: str):
         """Create a game instance."""
         game_config = config.GAMES[game_name]
-        game_class = self.import_class(game_config['class_path'])
+        game_class = import_class(game_config['class_path'])
         kwargs = game_config['kwargs'].copy()
         return game_class(**kwargs)
     
@@ -0,0 +1,311 @@
+"""
+Agent Tournament Script
+
+Rates a pool of agents on a game with Bradley-Terry ratings (on the Elo scale). Instead of
+playing every pairing a fixed number of times like test_agents.py, matches are scheduled
+adaptively: after a first round between every pair, only the pairs of agents next to each
+other in the ranking whose order is not settled yet keep playing. A pair is settled when
+its rating difference is significant, or when the confidence interval of the difference
+lies within an indifference margin (the agents are reported as tied). The tournament stops
+as soon as the ranking is settled or the game budget is spent.
+
+The configuration is a JSON file with the game and the agents, described like in
+test_agents.py:
+
+    {
+        "game": {"class_path": "games.tictactoe.tictactoe_native.NativeTicTacToe", "kwargs": {}},
+        "agents": {
+            "random": {"class_path": "agents.agent_random.RandomAgent", "kwargs": {}},
+            "mcts": {"class_path": "agents.mcts.MonteCarloTreeSearch", "kwargs": {"simulations": 50}}
+        }
+    }
+
+Run it with:
+
+    python tournament.py --config tournament_config.json --workers 4
+"""
+
+import json
+import argparse
+import itertools
+import numpy as np
+from statistics import NormalDist
+from concurrent.futures import ProcessPoolExecutor
+
+from base.game import AlternatingGame
+from base.utils import import_class, play_game, game_score
+
+# rating points per unit of Bradley-Terry strength (log odds)
+ELO_SCALE = 400 / np.log(10)
+
+
+class PairingPlayer:
+    """
+    Plays single seeded games between agents of the pool. The game and every agent in every
+    seat are built once, each worker process builds its own PairingPlayer.
+
+    Parameters:
+        game_spec: class path and kwargs of the game
+        agent_specs: class path and kwargs of every agent, by index
+    """
+
+    def __init__(self, game_spec: dict, agent_specs: list[dict]) -> None:
+        self.game: AlternatingGame = import_class(game_spec['class_path'])(**game_spec.get('kwargs', {}))
+        self.agents = [
+            {
+                agent_id: import_class(spec['class_path'])(self.game, agent_id, **spec.get('kwargs', {}))
+                for agent_id in self.game.agents
+            }
+            for spec in agent_specs
+        ]
+
+    def play_pairing(self, first: int, second: int, seed: int) -> tuple[float, int]:
+        """
+        Plays a game between two agents (the first one moves as the first agent of the game).
+
+        Returns:
+            Tuple of (score of the first agent: 1 win, 0.5 draw, 0 loss, game length)
+        """
+        first_id, second_id = self.game.agents
+        players = {first_id: self.agents[first][first_id], second_id: self.agents[second][second_id]}
+        length = play_game(self.game, players, seed)
+        return game_score(self.game, first_id), length
+
+
+# player of the worker processes, set by _init_worker
+_worker_player: PairingPlayer = None
+
+
+def _init_worker(game_spec: dict, agent_specs: list[dict]) -> None:
+    global _worker_player
+    _worker_player = PairingPlayer(game_spec, agent_specs)
+
+
+def _play_in_worker(task: tuple[int, int, int]) -> tuple[float, int]:
+    return _worker_player.play_pairing(*task)
+
+
+def bradley_terry(
+    games: np.ndarray,
+    scores: np.ndarray,
+    prior: float = 0.01,
+    iterations: int = 50
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Maximum a posteriori Bradley-Terry strengths.
+
+    Parameters:
+        games: (N, N) number of games between each pair of agents
+        scores: (N, N) points of agent i against agent j (draws count half)
+        prior: weight of the gaussian prior centered in 0, keeps the strengths finite when
+            an agent won or lost every game (default: 0.01)
+        iterations: Newton iterations (default: 50)
+    Returns:
+        (N,) strengths and (N, N) covariance of the strengths
+    """
+    n = len(games)
+    strengths = np.zeros(n)
+    for _ in range(iterations):
+        expected = 1 / (1 + np.exp(strengths[None, :] - strengths[:, None]))
+        gradient = (scores - games * expected).sum(axis=1) - prior * strengths
+        weights = games * expected * (1 - expected)
+        hessian = weights - np.diag(weights.sum(axis=1)) - prior * np.eye(n)
+        step = np.linalg.solve(hessian, gradient)
+        strengths -= step
+        if np.abs(step).max() < 1e-9:
+            break
+    return strengths, np.linalg.inv(-hessian)
+
+
+class Tournament:
+    """
+    Adaptive tournament between a pool of agents.
+
+    Parameters:
+        game_spec: class path and kwargs of the game
+        agent_specs: class path and kwargs of every agent, by name
+        confidence: confidence level of the rating intervals and of the stopping rule (default: 0.95)
+        margin: indifference margin in Elo, a pair whose rating difference is within
+            [-margin, margin] at the confidence level is settled as a tie (default: 50)
+        min_games: games of every pair in the first round (default: 20)
+        batch_games: games of every unsettled pair in each of the next rounds (default: 20)
+        max_games: total game budget (default: 5000)
+        workers: number of processes playing the games (default: 1)
+        seed: seed of the games (default: None)
+    """
+
+    def __init__(
+        self,
+        game_spec: dict,
+        agent_specs: dict[str, dict],
+        confidence: float = 0.95,
+        margin: float = 50.,
+        min_games: int = 20,
+        batch_games: int = 20,
+        max_games: int = 5000,
+        workers: int = 1,
+        seed: int = None
+    ) -> None:
+        if len(agent_specs) < 2:
+            raise ValueError("A tournament needs at least 2 agents.")
+        if margin < 0:
+            raise ValueError("Margin must be non-negative.")
+        self.game_spec = game_spec
+        self.names = list(agent_specs.keys())
+        self.agent_specs = [agent_specs[name] for name in self.names]
+        self.z = NormalDist().inv_cdf((1 + confidence) / 2)
+        self.margin = margin
+        self.min_games = min_games
+        self.batch_games = batch_games
+        self.max_games = max_games
+        self.workers = workers
+        self.seeds = np.random.SeedSequence(seed)
+
+        n = len(self.names)
+        self.games = np.zeros((n, n))
+        self.scores = np.zeros((n, n))
+        self.rounds = 0
+        # player of the games when they are not played by worker processes
+        self._player: PairingPlayer = None
+
+    def total_games(self) -> int:
+        return int(self.games.sum()) // 2
+
+    def ratings(self) -> tuple[np.ndarray, np.ndarray]:
+        """Elo scale ratings (mean 0) and their covariance."""
+        strengths, covariance = bradley_terry(self.games, self.scores)
+        # only differences of strengths are identified, center them
+        center = np.eye(len(strengths)) - 1 / len(strengths)
+        return ELO_SCALE * (center @ strengths), ELO_SCALE ** 2 * (center @ covariance @ center)
+
+    def neighbour_pairs(self) -> list[tuple[int, int, str | None]]:
+        """
+        Pairs of agents next to each other in the ranking with their order: 'ordered' when the
+        first one is significantly stronger, 'tied' when the confidence interval of their
+        rating difference lies within the margin, None while not settled.
+        """
+        ratings, covariance = self.ratings()
+        order = np.argsort(-ratings)
+        pairs = []
+        for i, j in zip(order[:-1], order[1:]):
+            difference = ratings[i] - ratings[j]
+            deviation = np.sqrt(max(covariance[i, i] + covariance[j, j] - 2 * covariance[i, j], 0.))
+            status = None
+            if difference >= self.z * deviation:
+                status = 'ordered'
+            elif difference + self.z * deviation <= self.margin:
+                status = 'tied'
+            pairs.append((int(i), int(j), status))
+        return pairs
+
+    def unsettled_pairs(self) -> list[tuple[int, int]]:
+        """Pairs of agents next to each other in the ranking whose order is not settled yet."""
+        return [(i, j) for i, j, status in self.neighbour_pairs() if status is None]
+
+    def _tasks(self, pairs: list[tuple[int, int]], n_games: int) -> list[tuple]:
+        # every pair plays both sides alternately, each game with its own seed
+        seeds = self.seeds.spawn(1)[0].generate_state(len(pairs) * n_games).tolist()
+        tasks = []
+        for p, (i, j) in enumerate(pairs):
+            for g in range(n_games):
+                first, second = (i, j) if g % 2 == 0 else (j, i)
+                tasks.append((first, second, seeds[p * n_games + g]))
+        return tasks
+
+    def _record(self, tasks: list[tuple], outcomes) -> None:
+        for (first, second, _), (score, _) in zip(tasks, outcomes):
+            self.games[first, second] += 1
+            self.games[second, first] += 1
+            self.scores[first, second] += score
+            self.scores[second, first] += 1 - score
+
+    def _play(self, executor: ProcessPoolExecutor, tasks: list[tuple]) -> None:
+        if executor is None:
+            if self._player is None:
+                self._player = PairingPlayer(self.game_spec, self.agent_specs)
+            outcomes = [self._player.play_pairing(*task) for task in tasks]
+        else:
+            outcomes = executor.map(_play_in_worker, tasks, chunksize=max(1, len(tasks) // (self.workers * 4)))
+        self._record(tasks, outcomes)
+        self.rounds += 1
+
+    def run(self, verbose: bool = False) -> list[dict]:
+        """Plays rounds until the ranking is settled or the budget is spent, returns the standings."""
+        executor = None
+        if self.workers > 1:
+            executor = ProcessPoolExecutor(
+                self.workers, initializer=_init_worker, initargs=(self.game_spec, self.agent_specs)
+            )
+        try:
+            pairs = list(itertools.combinations(range(len(self.names)), 2))
+            self._play(executor, self._tasks(pairs, self.min_games))
+            while self.total_games() < self.max_games:
+                pairs = self.unsettled_pairs()
+                if verbose:
+                    print(f"Round {self.rounds}: {self.total_games()} games, {len(pairs)} unsettled pairs")
+                if not pairs:
+                    break
+                budget = (self.max_games - self.total_games()) // len(pairs)
+                self._play(executor, self._tasks(pairs, min(self.batch_games, max(budget, 1))))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return self.standings()
+
+    def standings(self) -> list[dict]:
+        """Agents sorted by rating, with the confidence interval of each rating."""
+        ratings, covariance = self.ratings()
+        deviations = np.sqrt(np.diag(covariance))
+        tied = {j for _, j, status in self.neighbour_pairs() if status == 'tied'}
+        standings = []
+        for i in np.argsort(-ratings):
+            standings.append({
+                'agent': self.names[i],
+                'rating': float(ratings[i]),
+                'low': float(ratings[i] - self.z * deviations[i]),
+                'high': float(ratings[i] + self.z * deviations[i]),
+                'games': int(self.games[i].sum()),
+                'score': float(self.scores[i].sum() / max(self.games[i].sum(), 1)),
+                # tied with the agent ranked above
+                'tied': bool(i in tied),
+            })
+        return standings
+
+    def print_standings(self) -> None:
+        print(f"{'Agent':20} | {'Rating':>7} | {'Interval':>17} | {'Games':>6} | {'Score':>5} | Tie")
+        print("-" * 74)
+        for row in self.standings():
+            interval = f"[{row['low']:.0f}, {row['high']:.0f}]"
+            tie = "=" if row['tied'] else ""
+            print(f"{row['agent']:20} | {row['rating']:7.0f} | {interval:>17} | {row['games']:6d} | {row['score']:5.2f} | {tie}")
+        print(f"= tied with the agent above (rating difference within +-{self.margin:.0f} Elo)")
+        settled = "settled" if not self.unsettled_pairs() else "not settled"
+        print(f"{self.total_games()} games in {self.rounds} rounds, ranking {settled}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", type=str, required=True)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--margin", type=float, default=50., help="Elo difference below which two agents are tied")
+    parser.add_argument("--min-games", type=int, default=20)
+    parser.add_argument("--batch-games", type=int, default=20)
+    parser.add_argument("--max-games", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    with open(args.config, 'r') as file:
+        config = json.load(file)
+    tournament = Tournament(
+        config['game'],
+        config['agents'],
+        confidence=args.confidence,
+        margin=args.margin,
+        min_games=args.min_games,
+        batch_games=args.batch_games,
+        max_games=args.max_games,
+        workers=args.workers,
+        seed=args.seed
+    )
+    tournament.run(verbose=True)
+    tournament.print_standings()